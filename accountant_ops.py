@@ -1,5 +1,6 @@
 from datetime import datetime
 import data_handler
+import services
 
 # ------------------------------
 # Accountant Functions
@@ -7,42 +8,33 @@ import data_handler
 
 
 def record_guest_payment():
-    payments = data_handler.read_data(data_handler.FILE_PAYMENTS)
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-
     book_id = input("Enter Booking ID for payment: ")
-    booking = data_handler.find_record_by_id(bookings, "booking_id", book_id)
-
-    if booking:
-        amount = input("Enter Amount Paid: ")
-        if data_handler.is_valid_price(amount):
-            pay_date = datetime.now().strftime("%Y-%m-%d")
-            method = input("Enter Method (Cash/Card): ")
-            while method not in ["Cash", "Card"]:
-                print("Error: Payment method must be 'Cash' or 'Card'.")
-                method = input("Enter Method (Cash/Card): ")
-
-            new_payment = {
-                "payment_id": "P" + str(len(payments) + 1),
-                "booking_id": book_id,
-                "amount": float(amount),
-                "date": pay_date,
-                "method": method,
-            }
-
-            payments.append(new_payment)
-            data_handler.save_data(data_handler.FILE_PAYMENTS, payments)
-            # save_data(FILE_PAYMENTS, payments)
-            print(f"Success: Payment recorded for Booking {book_id}")
-        else:
-            print("Error: Invalid amount entered.")
-    else:
+    try:
+        # Payments can still come in for bookings that were archived
+        services.get_booking(book_id, include_archive=True)
+    except services.NotFound:
         print("Error: Booking ID not found.")
+        return
+
+    amount = input("Enter Amount Paid: ")
+    if not data_handler.is_valid_price(amount):
+        print("Error: Invalid amount entered.")
+        return
 
+    method = input("Enter Method (Cash/Card): ")
+    while method not in services.PAYMENT_METHODS:
+        print("Error: Payment method must be 'Cash' or 'Card'.")
+        method = input("Enter Method (Cash/Card): ")
 
-def generate_income_report():
-    payments = data_handler.read_data(data_handler.FILE_PAYMENTS)   
+    try:
+        services.record_payment(book_id, amount, method)
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Success: Payment recorded for Booking {book_id}")
 
+
+def generate_income_report():
     start_date = input("Enter Start Date (YYYY-MM-DD): ")
     while not data_handler.is_valid_date(start_date):
         print("\nError: Invalid date format.Please use YYYY-MM-DD format.")
@@ -52,16 +44,19 @@ def generate_income_report():
     while not data_handler.is_valid_date(end_date):
         print("\nError: Invalid date format.Please use YYYY-MM-DD format.")
         end_date = input("Enter End Date (YYYY-MM-DD): ")
-    total_income = 0.0
+
+    # Parse the period once; payment dates are already date objects
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
 
     print(f"\n--------- INCOME REPORT ({start_date} to {end_date}) ---------")
-    for record in payments:
-        if start_date <= record["date"] <= end_date:
-            print(
-                f"{record['date']} | Book ID: {record['booking_id']} | Amount: {record['amount']}"
-            )
-            total_income += float(record["amount"])
-    print(f"Total Income Collected: {total_income}")
+    # Only the payments of the period are read (other months are skipped)
+    report = services.income_report(start, end)
+    for record in report['payments']:
+        print(
+            f"{record['date']} | Book ID: {record['booking_id']} | Amount: {float(record['amount']):.2f}"
+        )
+    print(f"Total Income Collected: {report['total']:.2f}")
     print("-------------------------------------------------")
 
 
@@ -69,37 +64,22 @@ def generate_income_report():
 # Cancelled and pending bookings are excluded,
 def generate_outstanding_report():
 
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-    payments = data_handler.read_data(data_handler.FILE_PAYMENTS)   
-
-    total_owed = 0.0
-
     print("\n--- OUTSTANDING PAYMENTS REPORT ---")
 
-    # Create a set of paid booking IDs
-    paid_booking_ids = {p["booking_id"] for p in payments}
-
-    for b in bookings:
-        status = b.get("status")
-
-        # Skip cancelled or pending bookings
-        if status in ("Cancelled", "Pending"):
-            continue
+    # Bookings without a payment; archived ones can still be unpaid
+    report = services.outstanding_report()
 
-        # If booking not paid
-        if b["booking_id"] not in paid_booking_ids:
-            amount = float(b.get("total_price", 0))
-            total_owed += amount
-
-            print(
-                f"Unpaid Booking: {b['booking_id']} | "
-                f"Guest: {b['guest_name']} | "
-                f"Status: {status} | "
-                f"Amount Due: RM {amount}"
-            )
+    for b in report['bookings']:
+        amount = float(b.get("total_price", 0))
+        print(
+            f"Unpaid Booking: {b['booking_id']} | "
+            f"Guest: {b['guest_name']} | "
+            f"Status: {b.get('status')} | "
+            f"Amount Due: RM {amount:.2f}"
+        )
 
     print("----------------------------------")
-    print(f"TOTAL OUTSTANDING AMOUNT: RM {total_owed:.2f}")
+    print(f"TOTAL OUTSTANDING AMOUNT: RM {report['total']:.2f}")
 
 
 def get_valid_month():
@@ -115,55 +95,34 @@ def get_valid_month():
 
 def generate_monthly_summary():
     print("\n--- MONTHLY FINANCIAL REPORT ---")
-    payments = data_handler.read_data(data_handler.FILE_PAYMENTS)
 
     target_month = get_valid_month()
-        
-    if not payments:
-        print("No payment records found in system.")
-        return
 
-    # Initialize Counters
-    total_revenue = 0.0
-    transaction_count = 0
-    method_breakdown = {} # Dictionary to store totals like {'Cash': 500, 'Card': 200}
-    monthly_transactions = [] # List to store just this month's payments to print later
-
-    # 2. Process Data
-    for p in payments:
-        # Check if date matches (e.g., "2025-12-01" starts with "2025-12")
-        if p['date'].startswith(target_month):
-            amount = float(p['amount'])
-            method = p.get('method', 'Unknown') # Default to 'Unknown' if missing
-            
-            # Update Totals
-            total_revenue += amount
-            transaction_count += 1
-            
-            # Update Method Breakdown
-            if method in method_breakdown:
-                method_breakdown[method] += amount
-            else:
-                method_breakdown[method] = amount
-            
-            # Add to list for the ledger table
-            monthly_transactions.append(p)
+    # 1. Process Data (only the payments of the chosen month are read)
+    try:
+        summary = services.monthly_summary(target_month)
+    except services.NotFound as e:
+        print(e)
+        return
+    transaction_count = summary['count']
+    method_breakdown = summary['by_method'] # Totals like {'Cash': 500, 'Card': 200}
+    monthly_transactions = summary['payments']
 
     if transaction_count == 0:
         print(f"No transactions found for {target_month}.")
         return
 
-    # 3. Print Detailed Ledger Table
+    # 2. Print Detailed Ledger Table
     print(f"\nDetailed Ledger for {target_month}")
     print(f"{'Date':<12} {'Pay ID':<10} {'Booking':<10} {'Method':<10} {'Amount (RM)'}")
     print("-" * 60)
     
     for t in monthly_transactions:
-        print(f"{t['date']:<12} {t['payment_id']:<10} {t['booking_id']:<10} {t.get('method','-'):<10} {float(t['amount']):.2f}")
+        print(f"{str(t['date']):<12} {t['payment_id']:<10} {t['booking_id']:<10} {t.get('method','-'):<10} {float(t['amount']):.2f}")
         
     print("-" * 60)
 
-    # 4. Print Summaries
+    # 3. Print Summaries
     print(f"\nSUMMARY STATISTICS")
     print(f"Total Transactions: {transaction_count}")
     
@@ -175,7 +134,7 @@ def generate_monthly_summary():
             print(f"  {method:<10}: RM {amt:.2f}")
 
     print("=" * 30)
-    print(f"TOTAL REVENUE:    RM {total_revenue:.2f}")
+    print(f"TOTAL REVENUE:    RM {summary['total']:.2f}")
     print("=" * 30)
 
 # ------------------------------
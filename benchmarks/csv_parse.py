@@ -0,0 +1,103 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Run from the project folder: python benchmarks/csv_parse.py --rows 1000000
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import data_handler
+
+# ------------------------------
+# Parse-speed benchmark on a generated bookings file:
+#   str.split  -> the old hand-written line loop (breaks on quoted commas)
+#   csv module -> the csv-module C reader that data_handler uses now
+#   records    -> csv reader + typed Booking records + text values again,
+#                 i.e. everything read_data does per row except the indexes
+# ------------------------------
+
+HEADER = "booking_id,guest_name,guest_id,room_id,check_in,check_out,nights,status,total_price\n"
+
+
+def write_bookings_file(path, rows):
+    """Writes a bookings file with the given number of rows."""
+    with open(path, 'w') as file:
+        file.write(HEADER)
+        for i in range(1, rows + 1):
+            month = i % 12 + 1
+            file.write(f"B{i},Guest {i % 5000},G{i % 5000},R{i % 50 + 1},2025-{month:02d}-05,"
+                       f"2025-{month:02d}-08,3,Checked-out,{(i % 9 + 1) * 100}.00\n")
+
+
+def parse_with_split(path):
+    """The parser read_data used before: strip and split every line by hand."""
+    count = 0
+    with open(path, 'r') as file:
+        headers = file.readline().strip().split(',')
+        for line in file:
+            if not line.strip():
+                continue
+            values = line.strip().split(',')
+            count += 1
+    return count
+
+
+def parse_with_csv(path):
+    """The csv-module reader used by data_handler."""
+    count = 0
+    with open(path, 'r', newline='') as file:
+        lines = data_handler._csv_rows(file)
+        headers = next(lines)
+        for values in lines:
+            count += 1
+    return count
+
+
+def load_records(path):
+    """Parses every row into a Booking record and formats it back to text."""
+    count = 0
+    with open(path, 'r', newline='') as file:
+        lines = data_handler._csv_rows(file)
+        next(lines)
+        for values in lines:
+            data_handler.Booking.from_values(values).to_values()
+            count += 1
+    return count
+
+
+def best_time(function, path, repeat):
+    """Runs function(path) repeat times and returns (rows, fastest seconds)."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = function(path)
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return rows, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the old and the csv-module parser")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "bookings.txt")
+        print(f"Writing {args.rows} bookings...")
+        write_bookings_file(path, args.rows)
+
+        results = {}
+        for name, function in (("str.split", parse_with_split), ("csv module", parse_with_csv),
+                               ("records", load_records)):
+            rows, seconds = best_time(function, path, args.repeat)
+            results[name] = seconds
+            print(f"{name:<12}: {rows} rows in {seconds:.3f}s ({rows / seconds:,.0f} rows/sec)")
+
+        print(f"csv module vs str.split: {results['str.split'] / results['csv module']:.2f}x")
+        print(f"Share of the per-row load time spent parsing: "
+              f"{results['csv module'] / results['records']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import csv
+import data_handler
+
+# ------------------------------
+# Storage maintenance tools
+# Run from the project folder, e.g.:
+#   python data_tools.py sqlite-migrate
+#   python data_tools.py sqlite-export
+#   python data_tools.py partition
+#   python data_tools.py unpartition
+#   python data_tools.py archive --days 90 --compression lzma
+#   python data_tools.py import payments settlement.csv
+#   python data_tools.py import guests guests.csv --hash-iterations 100000
+#   python data_tools.py hash-passwords
+# ------------------------------
+
+
+def sqlite_migrate():
+    """Copies the .txt tables into the SQLite database."""
+    counts = data_handler.migrate_to_sqlite()
+    print(f"Success: Tables copied into {data_handler.DB_FILE}.")
+    for table, count in counts.items():
+        print(f"  {table:<10}: {count} rows")
+    print("Set STAYHUB_STORAGE=sqlite to run the system on the database.")
+
+
+def sqlite_export():
+    """Writes the SQLite tables back to the .txt files."""
+    counts = data_handler.export_from_sqlite()
+    print(f"Success: Tables exported from {data_handler.DB_FILE}.")
+    for table, count in counts.items():
+        print(f"  {table:<10}: {count} rows")
+
+
+def partition():
+    """Splits bookings and payments into one file per month."""
+    counts = data_handler.partition_tables()
+    print("Success: Bookings and payments are now stored per month.")
+    for table, count in counts.items():
+        print(f"  {table:<10}: {count} month files")
+
+
+def unpartition():
+    """Joins the month files of bookings and payments back into single files."""
+    counts = data_handler.unpartition_tables()
+    print("Success: Bookings and payments are stored in single files again.")
+    for table, count in counts.items():
+        print(f"  {table:<10}: {count} rows")
+
+
+def archive(days, compression):
+    """Moves finished bookings older than days into the compressed archive."""
+    count = data_handler.archive_bookings(days, compression)
+    if count is None:
+        print("Error: The bookings could not be archived. Please try again.")
+    elif count == 0:
+        print(f"No finished bookings older than {days} days to archive.")
+    else:
+        print(f"Success: {count} bookings moved to {data_handler.ARCHIVE_DIR}.")
+
+
+# Tables that can be bulk imported, by name
+IMPORT_TABLES = {
+    "rooms": data_handler.FILE_ROOMS,
+    "bookings": data_handler.FILE_BOOKINGS,
+    "payments": data_handler.FILE_PAYMENTS,
+    "guests": data_handler.FILE_GUESTS,
+}
+
+
+def bulk_import(table, csv_file, hash_iterations):
+    """Imports the rows of a CSV file (with a header line) into a table."""
+    try:
+        with open(csv_file, newline='') as file:
+            report = data_handler.bulk_import(IMPORT_TABLES[table], csv.DictReader(file), hash_iterations)
+    except OSError:
+        print(f"Error: Unable to read {csv_file}.")
+        return
+
+    print(f"Rows read:       {report['read']}")
+    print(f"Imported:        {report['imported']}")
+    print(f"Duplicates:      {report['duplicates']}")
+    print(f"Rejected:        {len(report['errors'])}")
+    for number, message in report['errors'][:10]:
+        print(f"  row {number}: {message}")
+    if len(report['errors']) > 10:
+        print(f"  ... and {len(report['errors']) - 10} more")
+    print(f"Time:            {report['seconds']:.2f}s ({report['rows_per_second']:.0f} rows/sec)")
+
+
+def hash_passwords():
+    """Converts the plain passwords in users.txt and guest.txt into hashes."""
+    counts = data_handler.hash_passwords()
+    if counts is None:
+        print("Error: The passwords could not be saved. Please try again.")
+        return
+    print("Success: Stored passwords are hashed.")
+    for table, count in counts.items():
+        print(f"  {table:<10}: {count} converted")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stay Hub storage maintenance tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("sqlite-migrate", help="copy the .txt tables into the SQLite database")
+    commands.add_parser("sqlite-export", help="write the SQLite tables back to .txt files")
+    commands.add_parser("partition", help="store bookings and payments in one file per month")
+    commands.add_parser("unpartition", help="join the month files back into single .txt files")
+    archive_parser = commands.add_parser("archive", help="move finished bookings into compressed archive files")
+    archive_parser.add_argument("--days", type=int, default=data_handler.ARCHIVE_AFTER_DAYS,
+                                help="archive bookings that checked out more than this many days ago")
+    archive_parser.add_argument("--compression", choices=sorted(data_handler.ARCHIVE_FORMATS),
+                                default=data_handler.ARCHIVE_COMPRESSION)
+    import_parser = commands.add_parser("import", help="bulk import rows from a CSV file")
+    import_parser.add_argument("table", choices=list(IMPORT_TABLES))
+    import_parser.add_argument("csv_file", help="CSV file with the table's column names in its first line")
+    import_parser.add_argument("--hash-iterations", type=int, default=data_handler.PASSWORD_ITERATIONS,
+                               help="PBKDF2 rounds for guest passwords (hashing is most of a guest "
+                                    "import's time; already hashed passwords are kept)")
+    commands.add_parser("hash-passwords", help="replace plain passwords with salted hashes")
+
+    args = parser.parse_args()
+
+    if args.command == "sqlite-migrate":
+        sqlite_migrate()
+    elif args.command == "sqlite-export":
+        sqlite_export()
+    elif args.command == "partition":
+        partition()
+    elif args.command == "unpartition":
+        unpartition()
+    elif args.command == "archive":
+        archive(args.days, args.compression)
+    elif args.command == "import":
+        bulk_import(args.table, args.csv_file, args.hash_iterations)
+    elif args.command == "hash-passwords":
+        hash_passwords()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,13 @@
-import data_handler
-from datetime import datetime, timedelta
+import services
 
 def view_available_rooms():
     print("\n--- AVAILABLE ROOMS ---")
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
     print(f"{'Type':<12} {'Price/Night':<12}")
     print("-" * 30)
     
     # Use a set to show unique types available (don't list 50 single rooms)
-    available_rooms = set()
-    for r in rooms:
-        if r['status'] == 'Available' and r['cleaning_status'] == 'Clean':
-            # Store tuple: (Type, Price)
-            available_rooms.add((r['type'], r['price']))
+    # Store tuple: (Type, Price)
+    available_rooms = {(r['type'], r['price']) for r in services.available_rooms()}
             
     if not available_rooms:
         print("Sorry, no rooms available at the moment.")
@@ -26,69 +21,51 @@ def make_reservation(current_guest):
     
     room_type = input("Enter Room Type (Single/Double/Deluxe): ").strip()
     days = input("Enter Number of Nights: ").strip()
+    check_in = input("Enter Check-in Date (YYYY-MM-DD, Enter for today): ").strip() or None
     
     if not days.isdigit():
         print("Error: Nights must be a number.")
         return
     
-    # 1. Check Availability
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-    target_room = None
-    
-    for r in rooms:
-        if (r['type'].lower() == room_type.lower() and 
-            r['status'] == 'Available' and r['cleaning_status'] == 'Clean'):
-            target_room = r
-            break
-            
-    if not target_room:
-        print("Sorry, no rooms of that type are available.")
+    # 1. Check Availability for every night of the stay
+    # (the price follows the rate calendar, e.g. weekends and holidays)
+    try:
+        offer = services.quote(room_type, check_in, days)
+    except services.NoRoomAvailable:
+        print("Sorry, no rooms of that type are available for those dates.")
+        return
+    except services.InvalidInput as e:
+        print(f"Error: {e}")
         return
 
     # 2. Confirm Price
-    price = float(target_room['price'])
-    total = price * int(days)
-    print(f"Price per night: RM {price:.2f}")
-    print(f"Total for {days} nights: RM {total:.2f}")
+    print(f"Price per night: RM {offer['per_night']:.2f}")
+    print(f"Total for {days} nights: RM {offer['total']:.2f}")
     
     confirm = input("Confirm Booking? (y/n): ").strip().lower()
     if confirm != 'y': return
 
-    # 3. Create Booking
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-    new_id = f"B{len(bookings) + 1}"
-    
-    # Date Logic
-    now = datetime.now()
-    check_in = now.strftime("%Y-%m-%d")
-    check_out = (now + timedelta(days=int(days))).strftime("%Y-%m-%d")
-    
-    new_booking = {
-        'booking_id': new_id,
-        'guest_name': current_guest['full_name'],
-        'guest_id': current_guest['guest_id'], # Link to this specific user
-        'room_id': target_room['room_id'],
-        'check_in': check_in,
-        'check_out': check_out,
-        'nights': days,
-        'status': 'Confirmed', # Guests create 'Confirmed' reservations
-        'total_price': f"{total:.2f}"
-    }
-    
-    # 4. Update Files
-    target_room['status'] = 'Reserved'
-    bookings.append(new_booking)
-    
-    data_handler.save_data(data_handler.FILE_BOOKINGS, bookings)
-    data_handler.save_data(data_handler.FILE_ROOMS, rooms)
-    print(f"Success! Your Booking ID is {new_id}.")
+    # 3. Create Booking (Guests create 'Confirmed' reservations)
+    # The quoted room is booked at the quoted price. Booking and room are
+    # saved together: if another user took the room in the meantime nothing
+    # is saved and no booking is created.
+    try:
+        booking = services.book_room(current_guest['guest_id'], room_type, days, check_in=check_in,
+                                     room_id=offer['room']['room_id'], quoted_total=offer['total'])
+    except (services.NoRoomAvailable, services.SaveFailed):
+        print("Sorry, that room was just taken. Please try again.")
+        return
+    except (services.InvalidInput, services.InvalidState) as e:
+        print(f"Error: {e}")
+        return
+    print(f"Success! Your Booking ID is {booking['booking_id']}.")
     print("Please proceed to payment at the reception upon arrival.")
 
 def my_history(current_guest):
     print(f"\n--- BOOKING HISTORY: {current_guest['full_name']} ---")
     
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-    my_bookings = [b for b in bookings if b['guest_id'] == current_guest['guest_id']]
+    # Older stays come from the archive, current ones from the guest index
+    my_bookings = services.guest_history(current_guest['guest_id'])
     
     if not my_bookings:
         print("No booking history found.")
@@ -96,7 +73,7 @@ def my_history(current_guest):
         print(f"{'ID':<6} {'Room':<6} {'Check-In':<12} {'Status':<12} {'Total (RM)'}")
         print("-" * 55)
         for b in my_bookings:
-            print(f"{b['booking_id']:<6} {b['room_id']:<6} {b['check_in']:<12} {b['status']:<12} {b['total_price']}")
+            print(f"{b['booking_id']:<6} {b['room_id']:<6} {str(b['check_in']):<12} {b['status']:<12} {b['total_price']:.2f}")
     
 
 def cancel_my_booking(current_guest):
@@ -105,38 +82,23 @@ def cancel_my_booking(current_guest):
     
     booking_id = input("Enter Booking ID to cancel: ").strip()
     
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-    
-    # Find booking that belongs to THIS guest
-    target = None
-    for b in bookings:
-        if b['booking_id'] == booking_id and b['guest_id'] == current_guest['guest_id']:
-            target = b
-            break
-            
-    if not target:
+    # Only bookings that belong to THIS guest can be cancelled, and only
+    # 'Confirmed' (future) ones; the room is freed again
+    try:
+        services.cancel_booking(booking_id, current_guest['guest_id'])
+    except services.NotFound:
         print("Error: Booking ID not found in your history.")
         return
-        
-    # Validation: Guests can only cancel 'Confirmed' (future) bookings
-    if target['status'] != 'Confirmed':
-        print(f"Cannot cancel. Current status is '{target['status']}'.")
+    except services.InvalidState as e:
+        print(e)
         print("Contact reception for assistance.")
         return
-
-    # Process Cancellation
-    target['status'] = 'Cancelled'
-    target['total_price'] = "0.00"
-    
-    # Free the room
-    for r in rooms:
-        if r['room_id'] == target['room_id']:
-            r['status'] = 'Available'
-            break
-            
-    data_handler.save_data(data_handler.FILE_BOOKINGS, bookings)
-    data_handler.save_data(data_handler.FILE_ROOMS, rooms)
+    except services.SaveFailed:
+        print("Error: The reservation could not be cancelled. Please try again.")
+        return
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
     print("Reservation cancelled successfully.")
 
 def show_menu(current_guest):
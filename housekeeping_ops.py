@@ -1,4 +1,4 @@
-import data_handler
+import services
 
 def show_menu():
     while True:
@@ -26,32 +26,24 @@ def update_cleaning_status():
 
     room_id = input("Enter Room ID: ")
 
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-    target_room = data_handler.find_record_by_id(rooms, "room_id", room_id)
-
-    if target_room is None:
-        print("Error: Room ID not found.")
+    try:
+        target_room = services.mark_room_clean(room_id)
+    except services.SaveFailed:
+        print("Error: The room could not be marked as Clean. Please try again.")
         return
-
-    if target_room["cleaning_status"] != "Dirty":
-        print("Error: This room is already clean.")
+    except services.ServiceError as e:
+        print(f"Error: {e}")
         return
 
-    target_room["cleaning_status"] = "Clean"
-
     if target_room["status"] == "Available":
         print("Room is now ready for guests.")
-
-    data_handler.save_data(data_handler.FILE_ROOMS, rooms)
     print("Success: Room marked as Clean.")
     
 def update_maintenance_issue():
     print("\n--- HOUSEKEEPING: RESOLVE ROOM MAINTENANCE ---")
 
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-
     # Filter rooms in maintenance
-    maintenance_rooms = [room for room in rooms if room["status"] == "Maintenance"]
+    maintenance_rooms = services.rooms_in_maintenance()
 
     if maintenance_rooms:
         print("Current Rooms in Maintenance:")
@@ -67,26 +59,19 @@ def update_maintenance_issue():
     print("-" * 25)
 
     target_id = input("Enter Room ID to set as Available: ")
-    target_room = data_handler.find_record_by_id(rooms, "room_id", target_id)
-
-    if target_room is None:
-        print(f"Error: Room ID {target_id} does not exist.")
+    try:
+        services.resolve_maintenance(target_id)
+    except services.SaveFailed:
+        print(f"Error: Room {target_id} could not be updated. Please try again.")
         return
-
-    if target_room["status"] == "Maintenance":
-        target_room["status"] = "Available"
-        target_room["cleaning_status"] = "Dirty"
-
-        data_handler.save_data(data_handler.FILE_ROOMS, rooms)
-        print(f"Success: Room {target_id} updated to Available. Needs Cleaning.")
-    else:
-        print(f"Error: Room {target_id} is not currently in Maintenance.")
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Success: Room {target_id} updated to Available. Needs Cleaning.")
 
 
 def view_cleaning_schedule():
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-
-    dirty_rooms = [room for room in rooms if room["cleaning_status"] != "Clean"]
+    dirty_rooms = services.rooms_to_clean()
 
     if dirty_rooms:  
         print(f'{"Room ID":<10} {"Type":<15} {"Cleaning Status":<20}')
@@ -98,10 +83,8 @@ def view_cleaning_schedule():
 
 def view_cleaning_schedule():
     print("\n--- HOUSEKEEPING SCHEDULE ---")
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-
     # Filter for rooms that are NOT clean
-    dirty_rooms = [room for room in rooms if room["cleaning_status"] != "Clean"]
+    dirty_rooms = services.rooms_to_clean()
 
     if dirty_rooms:  
         print(f'{"Room ID":<10} {"Type":<15} {"Cleaning Status":<20}')
@@ -1,15 +1,20 @@
+import sys
+import json
 import time
+import argparse
 import data_handler
 import manager_ops
 import receptionist_ops
 import accountant_ops
 import housekeeping_ops
 import guest_ops
+import services
+import server
 
 # --- LOGIN SYSTEM ---
 def login():
     """
-    Reads users.txt and guest.txt to validate username and password.
+    Validates the username and password against the staff and guest accounts.
     Returns the role if successful, or None if failed.
     """
     print("\n" + "="*35)
@@ -19,28 +24,19 @@ def login():
     input_user = input("Username: ").strip()
     input_pass = input("Password: ").strip()
     
-    # Check staff users first
-    users = data_handler.read_data(data_handler.FILE_USERS)
+    # One lookup in the account index (staff and guests) and one hash check
+    try:
+        role, user = services.login(input_user, input_pass)
+    except services.LoginFailed as e:
+        print(f"\nError: {e}")
+        return "",None
     
-    if users:
-        for user in users:
-            if user['username'] == input_user and user['password'] == input_pass:
-                print(f"\nLogin Successful! Welcome, {user['full_name']} ({user['role']})")
-                return user['role'],user
-            
-    
-    # Check guest users
-    guests = data_handler.read_data(data_handler.FILE_GUESTS)
-    
-    if guests:
-        for guest in guests:
-            if guest['username'] == input_user and guest['password'] == input_pass:
-                print(f"\nLogin Successful! Welcome, {guest['full_name']} (Guest)")
-                time.sleep(1)
-                return "Guest",guest
-    
-    print("\nError: Invalid Username or Password.")
-    return "",None
+    if role == "Guest":
+        print(f"\nLogin Successful! Welcome, {user['full_name']} (Guest)")
+        time.sleep(1)
+        return role,user
+    print(f"\nLogin Successful! Welcome, {user['full_name']} ({user['role']})")
+    return role,user
 
 # --- MAIN CONTROLLER ---
 def main():
@@ -76,5 +72,114 @@ def main():
             print("Goodbye!Thank you for using Stay Hub Hotel Management System.")
             break
 
+# --- BATCH MODE ---
+# python main.py --batch day.jsonl [--results results.jsonl]
+# Replays a file of operations, one JSON object per line, e.g.
+#   {"op": "register_guest", "args": {"full_name": "Ann Lee", "ic_passport": "X1", "phone": "012",
+#                                     "email": "ann@mail.com", "username": "ann", "password": "secret1"}}
+#   {"op": "book_room", "args": {"guest_id": "G5", "room_type": "Double", "nights": 2}}
+#   {"op": "record_payment", "args": {"booking_id": "B15", "amount": 400, "method": "Card"}}
+# The operations are the ones server.py offers (plus "login"). Tables are
+# loaded once, every change stays in memory and everything is saved in a
+# single commit at the end.
+def run_batch(path, results_path=None):
+    """Runs every operation of a JSON-lines file and prints latency and throughput."""
+    try:
+        batch_file = open(path)
+    except OSError:
+        print(f"Error: Unable to read {path}.")
+        return False
+
+    results = open(results_path, 'w') if results_path else None
+    latencies = {}  # e.g. {'book_room': [0.0012, 0.0009, ...]}
+    errors = []     # e.g. [(3, 'book_room', "No clean 'Deluxe' rooms available.")]
+    load_seconds = server.warm_up()
+    data_handler.set_write_behind(True)
+
+    started = time.perf_counter()
+    with batch_file:
+        for number, line in enumerate(batch_file, start=1):
+            if not line.strip():
+                continue
+            op_started = time.perf_counter()
+            op = "(invalid)"
+            # 1. Read the request: a JSON object with a text 'op' and object 'args'
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict) or not isinstance(request.get("op"), str):
+                    raise ValueError
+                args = request.get("args") or {}
+                if not isinstance(args, dict):
+                    raise ValueError
+            except ValueError:
+                response = {"ok": False, "error": "BadRequest", "message": "Each line must be a JSON object with an 'op'."}
+            else:
+                # 2. Run it; refusals and unexpected failures are reported per operation
+                op = request["op"]
+                try:
+                    if op == "login":
+                        role, user = services.login(args.get("username", ""), args.get("password", ""))
+                        response = {"ok": True, "result": {"role": role}}
+                    elif op in server.OPERATIONS:
+                        response = {"ok": True, "result": server.call_operation(op, args)}
+                    else:
+                        raise services.InvalidInput(f"Unknown operation '{op}'.")
+                except services.ServiceError as e:
+                    response = {"ok": False, "error": type(e).__name__, "message": str(e)}
+                except Exception as e:
+                    response = {"ok": False, "error": type(e).__name__, "message": f"Operation '{op}' failed: {e}"}
+            latencies.setdefault(op, []).append(time.perf_counter() - op_started)
+
+            if not response["ok"]:
+                errors.append((number, op, response["message"]))
+            if results:
+                response["line"] = number
+                results.write(json.dumps(response) + "\n")
+    run_seconds = time.perf_counter() - started
+
+    # One commit for the whole batch
+    commit_started = time.perf_counter()
+    saved = data_handler.set_write_behind(False)
+    commit_seconds = time.perf_counter() - commit_started
+    if results:
+        results.close()
+
+    # Report
+    total = sum(len(times) for times in latencies.values())
+    print(f"\n--- BATCH REPORT: {path} ---")
+    print(f"{'Operation':<22} {'Count':>7} {'Errors':>7} {'Avg ms':>8} {'p95 ms':>8} {'Max ms':>8}")
+    print("-" * 65)
+    error_counts = {}
+    for _, op, _ in errors:
+        error_counts[op] = error_counts.get(op, 0) + 1
+    for op, times in sorted(latencies.items()):
+        times.sort()
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        print(f"{op:<22} {len(times):>7} {error_counts.get(op, 0):>7} "
+              f"{sum(times) / len(times) * 1000:>8.3f} {p95 * 1000:>8.3f} {times[-1] * 1000:>8.3f}")
+    print("-" * 65)
+    print(f"Operations:  {total} ({len(errors)} refused)")
+    print(f"Load:        {load_seconds:.3f}s")
+    print(f"Run:         {run_seconds:.3f}s ({total / run_seconds if run_seconds > 0 else 0:.0f} ops/sec)")
+    print(f"Commit:      {commit_seconds:.3f}s")
+    locks = data_handler.lock_stats().values()
+    print(f"Locks:       {sum(l['acquired'] for l in locks)} taken, {sum(l['contended'] for l in locks)} contended, "
+          f"{sum(l['wait_total'] for l in locks) * 1000:.3f} ms waiting (max {max([l['wait_max'] for l in locks], default=0) * 1000:.3f} ms)")
+    for number, op, message in errors[:10]:
+        print(f"  line {number} ({op}): {message}")
+    if len(errors) > 10:
+        print(f"  ... and {len(errors) - 10} more")
+    if not saved:
+        print("Error: The batch could not be saved. Nothing was written.")
+    return saved
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stay Hub Hotel Management System")
+    parser.add_argument("--batch", metavar="FILE", help="replay a JSON-lines file of operations instead of the menus")
+    parser.add_argument("--results", metavar="FILE", help="with --batch, write every operation's result to this file")
+    args = parser.parse_args()
+
+    if args.batch:
+        sys.exit(0 if run_batch(args.batch, args.results) else 1)
     main()
\ No newline at end of file
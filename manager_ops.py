@@ -1,11 +1,10 @@
 import data_handler
-from datetime import datetime, timedelta
+import services
 
 def add_room():
     print("\n--- ADD NEW ROOM ---")
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
     r_type = input("Enter Room Type (Single/Double/Deluxe): ").strip()
-    while r_type not in ['Single', 'Double', 'Deluxe']:
+    while r_type not in services.ROOM_TYPES:
         print("Error: Invalid room type. Please enter Single, Double, or Deluxe.")
         r_type = input("Enter Room Type (Single/Double/Deluxe): ").strip()
     price = input("Enter Price per Night: ").strip()
@@ -14,53 +13,39 @@ def add_room():
         print("Error: Price must be a valid positive number.")
         price = input("Enter Price per Night: ").strip()
 
-    # Create new record
-    new_room = {
-        'room_id': "R" + str(len(rooms) + 1),
-        'type': r_type,
-        'price': price,
-        'status': 'Available',
-        'cleaning_status': 'Clean'
-    }
-    
-    rooms.append(new_room)
-    data_handler.save_data(data_handler.FILE_ROOMS, rooms)
+    try:
+        services.add_room(r_type, price)
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
     print("Success: Room added.")
 
 def delete_room():
     print("\n--- DELETE ROOM ---")
     room_id = input("Enter Room ID to delete: ").strip()
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-    
-    # List comprehension to keep rooms NOT matching the ID
-    new_rooms = [r for r in rooms if r['room_id'] != room_id]
-    
-    if len(rooms) == len(new_rooms):
+    try:
+        services.delete_room(room_id)
+    except services.NotFound:
         print("Room ID not found.Please try again.")
-    else:
-        data_handler.save_data(data_handler.FILE_ROOMS, new_rooms)
-        print("Success: Room deleted.")
+        return
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
+    print("Success: Room deleted.")
 
 def system_summary():
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-    payments = data_handler.read_data(data_handler.FILE_PAYMENTS)
-    
-    total_rooms = len(rooms)
-    occupied = len([r for r in rooms if r['status'] == 'Occupied'])
-    
-    # Calculate total income from payments
-    total_income = 0
-    try:
-        total_income = sum(float(p.get('amount', 0)) for p in payments)
-    except (ValueError, TypeError):
-        pass
+    # Bookings are counted with the archived ones, without loading the whole history
+    summary = services.system_summary()
+    total_rooms = summary['total_rooms']
+    occupied = summary['occupied']
     
     print("\n--- SYSTEM SUMMARY REPORT ---")
     print(f"Total Rooms: {total_rooms}")
     print(f"Occupied Rooms: {occupied}")
-    print(f"Total Bookings Recorded: {len(bookings)}")
-    print(f"Total Hotel Income: RM {total_income:.2f}")
+    ready = ", ".join(f"{room_type} {count}" for room_type, count in summary['ready'].items())
+    print(f"Ready Rooms: {ready}")
+    print(f"Total Bookings Recorded: {summary['total_bookings']}")
+    print(f"Total Hotel Income: RM {summary['total_income']:.2f}")
     if total_rooms > 0:
         print(f"Occupancy Rate: {(occupied/total_rooms)*100:.2f}%")
 
@@ -69,11 +54,10 @@ def update_room():
     print("\n--- UPDATE ROOM ---")
     room_id = input("Enter Room ID to update: ").strip()
 
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-    target_room = data_handler.find_record_by_id(rooms, 'room_id', room_id)
-
-    if not target_room:
-        print("Error: Room ID not found.")
+    try:
+        target_room = services.get_room(room_id)
+    except services.NotFound as e:
+        print(f"Error: {e}")
         return
 
     print("\nPress Enter to keep the current value.")
@@ -88,8 +72,6 @@ def update_room():
             if new_type == "":
                 new_type = None
                 break
-        if new_type:
-            target_room["type"] = new_type
 
     # --- Price ---
     current_price = target_room.get("price", "")
@@ -101,8 +83,6 @@ def update_room():
             if new_price == "":
                 new_price = None
                 break
-        if new_price:
-            target_room["price"] = new_price
 
     # --- Status ---
     current_status = target_room.get("status", "")
@@ -116,8 +96,6 @@ def update_room():
             if new_status == "":
                 new_status = None
                 break
-        if new_status:
-            target_room["status"] = new_status
 
     # --- Cleaning Status ---
     current_clean = target_room.get("cleaning_status", "")
@@ -129,39 +107,31 @@ def update_room():
             if new_clean == "":
                 new_clean = None
                 break
-        if new_clean:
-            target_room["cleaning_status"] = new_clean
 
     # Save data
-    data_handler.save_data(data_handler.FILE_ROOMS, rooms)
+    try:
+        services.update_room(room_id, new_type, new_price, new_status, new_clean)
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
     print("Success: Room updated.")
 
 def generate_daily_report():
     """Generate daily performance report."""
     print("\n--- DAILY PERFORMANCE REPORT ---")
     
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-    payments = data_handler.read_data(data_handler.FILE_PAYMENTS)
+    # Bookings made today and status counts come straight from the indexes
+    report = services.daily_report()
+    today_bookings = report['check_ins']
     
-    today = datetime.now().strftime("%Y-%m-%d")
-    
-    # Bookings made today
-    today_bookings = [b for b in bookings if b.get('check_in') == today]
-    
-    # Payments made today
-    today_payments = [p for p in payments if p.get('date') == today]
-    today_revenue = sum(float(p.get('amount', 0)) for p in today_payments if data_handler.is_valid_price(p.get('amount', 0)))
-    
-    print(f"Date: {today}")
+    print(f"Date: {report['date']}")
     print(f"New Check-ins Today: {len(today_bookings)}")
-    print(f"Payments Received Today: {len(today_payments)}")
-    print(f"Daily Revenue: RM {today_revenue:.2f}")
+    print(f"Payments Received Today: {len(report['payments'])}")
+    print(f"Daily Revenue: RM {report['revenue']:.2f}")
     
     # Active bookings
-    active_bookings = [b for b in bookings if b.get('status') == 'Checked-in']
-    pending_bookings = [b for b in bookings if b.get('status') == 'Confirmed']
-    print(f"Current Active Bookings: {len(active_bookings)}")
-    print(f"Pending Bookings (Not Yet Checked In): {len(pending_bookings)}")
+    print(f"Current Active Bookings: {report['active']}")
+    print(f"Pending Bookings (Not Yet Checked In): {report['pending']}")
     
     if today_bookings:
         print("\nNew Check-ins:")
@@ -172,48 +142,45 @@ def generate_monthly_report():
     """Generate monthly performance report."""
     print("\n--- MONTHLY PERFORMANCE REPORT ---")
     
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-    payments = data_handler.read_data(data_handler.FILE_PAYMENTS)
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-    
-    current_month = datetime.now().strftime("%Y-%m")
-    
-    # Filter bookings and payments for current month
-    month_bookings = [b for b in bookings if b.get('check_in', '')[:7] == current_month]
-    month_payments = [p for p in payments if p.get('date', '')[:7] == current_month]
-    
-    # Calculate monthly revenue
-    month_revenue = 0
-    try:
-        month_revenue = sum(float(p.get('amount', 0)) for p in month_payments)
-    except (ValueError, TypeError):
-        pass
-    
-    # Calculate average occupancy and count booking statuses
-    checked_out_bookings = [b for b in month_bookings if b.get('status') == 'Checked-out']
-    active_bookings = [b for b in month_bookings if b.get('status') == 'Checked-in']
-    pending_bookings = [b for b in month_bookings if b.get('status') == 'Confirmed']
-    total_rooms = len(rooms) if len(rooms) > 0 else 1
-    days_in_month = datetime.now().day
+    # Only the bookings and payments of the current month are read
+    report = services.monthly_report()
+    month_payments = report['payments']
+    month_revenue = report['revenue']
     
-    if days_in_month > 0:
-        avg_occupancy = (len(checked_out_bookings) / total_rooms / days_in_month) * 100
-    else:
-        avg_occupancy = 0
-    
-    print(f"Month: {current_month}")
-    print(f"Total Bookings: {len(month_bookings)}")
-    print(f"Completed Bookings: {len(checked_out_bookings)}")
-    print(f"Active Bookings: {len(active_bookings)}")
-    print(f"Pending Bookings: {len(pending_bookings)}")
+    print(f"Month: {report['month']}")
+    print(f"Total Bookings: {len(report['bookings'])}")
+    print(f"Completed Bookings: {report['completed']}")
+    print(f"Active Bookings: {report['active']}")
+    print(f"Pending Bookings: {report['pending']}")
     print(f"Total Revenue: RM {month_revenue:.2f}")
-    print(f"Average Occupancy Rate: {avg_occupancy:.2f}%")
-    print(f"Total Rooms: {total_rooms}")
+    print(f"Average Occupancy Rate: {report['avg_occupancy']:.2f}%")
+    print(f"Total Rooms: {report['total_rooms']}")
     
     if len(month_payments) > 0:
         avg_payment = month_revenue / len(month_payments)
         print(f"Average Payment per Booking: RM {avg_payment:.2f}")
 
+def occupancy_forecast():
+    """Show the free rooms per type for the coming nights."""
+    print("\n--- OCCUPANCY FORECAST ---")
+    start = input("Enter Start Date (YYYY-MM-DD, Enter for today): ").strip()
+    days = input("Enter Number of Nights (Enter for 14): ").strip()
+
+    try:
+        forecast = services.occupancy_forecast(start or None, days or 14)
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
+
+    # Free rooms per night, out of the rooms of each type in service
+    header = "".join(f"{room_type} ({forecast['rooms'][room_type]})".ljust(14) for room_type in services.ROOM_TYPES)
+    print(f"{'Date':<12} {header}")
+    print("-" * (13 + 14 * len(services.ROOM_TYPES)))
+    for n, night in enumerate(forecast['dates']):
+        free = "".join(str(forecast['free'][room_type][n]).ljust(14) for room_type in services.ROOM_TYPES)
+        print(f"{str(night):<12} {free}")
+    print(f"Fill Rate: {forecast['fill_rate']:.2f}%")
+
 def show_menu():
     while True:
         print("\n=== MANAGER MENU ===")
@@ -224,6 +191,7 @@ def show_menu():
         print("5. View System Summary")
         print("6. Generate Daily Report")
         print("7. Generate Monthly Report")
+        print("8. Occupancy Forecast")
         print("0. Back to Main Menu")
         
         choice = input("Enter choice: ")
@@ -246,6 +214,8 @@ def show_menu():
             generate_daily_report()
         elif choice == '7':
             generate_monthly_report()
+        elif choice == '8':
+            occupancy_forecast()
         elif choice == '0':
             break
         else:
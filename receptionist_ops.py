@@ -1,5 +1,5 @@
 import data_handler
-from datetime import datetime,timedelta
+import services
 
 def show_menu():
     while True:
@@ -11,6 +11,8 @@ def show_menu():
         print("5. Check-Out Guest")
         print("6. Cancel Booking")
         print("7. View Room Availability")
+        print("8. Group Booking")
+        print("9. Overdue Guests")
         print("0. Back")
 
         choice = input("Enter choice: ")
@@ -29,6 +31,10 @@ def show_menu():
             cancel_booking()
         elif choice == "7":
             view_room_availability()
+        elif choice == "8":
+            book_group()
+        elif choice == "9":
+            view_overdue_guests()
         elif choice == "0":
             break
         else:
@@ -59,117 +65,88 @@ def register_guest():
         print("Error: Password must be at least 6 characters long.")
         password = input("Enter New Password: ").strip()
     
-    # 3. Validation
-    if not name or not ic_pass or not username or not password:
-        print("Error: All fields (Name, IC, Username, Password) are required.")
+    # 3. Validation and Save
+    try:
+        services.register_guest(name, ic_pass, phone, email, username, password)
+    except services.ServiceError as e:
+        print(f"Error: {e}")
         return
-    
-    # Check for duplicates (Username AND IC)
-    guests = data_handler.read_data(data_handler.FILE_GUESTS)
-    for g in guests:
-        if g['ic_passport'] == ic_pass:
-            print("Error: Guest with this IC/Passport already registered!")
-            return
-        if g['username'] == username:
-            print("Error: Username already taken!")
-            return
-
-    # 4. Save Data
-    new_id = f"G{len(guests) + 1}"
-    
-    new_guest = {
-        'guest_id': new_id,
-        'username': username,
-        'password': password,
-        'full_name': name, # using 'full_name'
-        'phone': phone,
-        'ic_passport': ic_pass,
-        'email': email
-    }
-    
-    guests.append(new_guest)
-    data_handler.save_data(data_handler.FILE_GUESTS, guests)
     print(f"Success: Guest {name} registered. They can now login as '{username}'.")
 
 
 def book_room():
     print("\n--- ADVANCE ROOM RESERVATION ---")
     
-    # 1. Validate Guest (Using Standard Loop)
+    # 1. Collect Booking Details
     guest_id = input("Enter Guest ID (e.g., G1): ").strip()
-    guests = data_handler.read_data(data_handler.FILE_GUESTS)
-    
-    found_guest = None
-    for g in guests:
-        if g['guest_id'] == guest_id:
-            found_guest = g
-            break  # Stop looping once found
-            
-    if not found_guest:
+    try:
+        services.get_guest(guest_id)
+    except services.NotFound:
         print("Error: Guest ID not found. Please register first.")
         return
 
-    # 2. Find Room and Get Price
     room_type = input("Enter Desired Room Type: ").strip()
     days = input("Enter Number of Nights: ").strip()
-    
-    if not days.isdigit():
-        print("Error: Nights must be a number.")
+    check_in = input("Enter Check-in Date (YYYY-MM-DD, Enter for today): ").strip()
+
+    # 2. Reserve a room of that type that is free for every night of the stay
+    try:
+        booking = services.book_room(guest_id, room_type, days, check_in=check_in or None)
+    except services.SaveFailed:
+        print("Error: The room could not be reserved. Please try again.")
+        return
+    except services.ServiceError as e:
+        print(f"Error: {e}")
         return
     
-    nights_int = int(days)
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-    
-    assigned_room = None
-    room_price = 0.0
+    print("-" * 40)
+    print(f"SUCCESS: Room {booking['room_id']} Reserved for {booking['nights']} nights from {booking['check_in']}.")
+    print(f"Total Price: RM {booking['total_price']:.2f}")
+    print("-" * 40)
     
-    for r in rooms:
-        # Check Type, Status, and Cleaning
-        if (r['type'].lower() == room_type.lower() and 
-            r['status'] == 'Available' and 
-            r['cleaning_status'] == 'Clean'):
-            assigned_room = r
-            room_price = float(r['price'])
-            break # Stop looping once found
-            
-    if not assigned_room:
-        print(f"Error: No clean '{room_type}' rooms available.")
+
+def book_group():
+    print("\n--- GROUP RESERVATION ---")
+
+    # 1. The group is booked under one guest (e.g. the tour leader)
+    guest_id = input("Enter Guest ID of the group leader (e.g., G1): ").strip()
+    try:
+        services.get_guest(guest_id)
+    except services.NotFound:
+        print("Error: Guest ID not found. Please register first.")
         return
 
-    # 3. Calculate Dates & Total
-    now_obj = datetime.now()
-    check_in_str = now_obj.strftime("%Y-%m-%d")
-    check_out_obj = now_obj + timedelta(days=nights_int)
-    check_out_str = check_out_obj.strftime("%Y-%m-%d")
-    total_cost = room_price * nights_int
+    # 2. Collect the rooms per type, e.g. "Double 20"
+    room_counts = {}
+    while True:
+        line = input("Enter Room Type and Count (e.g., Double 20, blank to finish): ").strip()
+        if not line:
+            break
+        parts = line.split()
+        if len(parts) != 2 or not parts[1].isdigit():
+            print("Error: Type the room type and the number of rooms, e.g. Double 20.")
+            continue
+        room_counts[parts[0]] = room_counts.get(parts[0], 0) + int(parts[1])
+    days = input("Enter Number of Nights: ").strip()
+    check_in = input("Enter Check-in Date (YYYY-MM-DD, Enter for today): ").strip()
+
+    # 3. Reserve every room or none of them
+    try:
+        group = services.book_group(guest_id, room_counts, days, check_in=check_in or None)
+    except services.SaveFailed:
+        print("Error: The rooms could not be reserved. Please try again.")
+        return
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
 
-    # 4. Create Booking Record
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-    new_id = f"B{len(bookings) + 1}"
-    
-    new_booking = {
-        'booking_id': new_id,
-        'guest_name': found_guest['full_name'],
-        'guest_id': guest_id,
-        'room_id': assigned_room['room_id'],
-        'check_in': check_in_str,
-        'check_out': check_out_str,
-        'nights': days,
-        'status': 'Confirmed',
-        'total_price': f"{total_cost:.2f}"
-    }
-    
-    # 5. Save Files
-    assigned_room['status'] = 'Reserved'
-    bookings.append(new_booking)
-    data_handler.save_data(data_handler.FILE_BOOKINGS, bookings)
-    data_handler.save_data(data_handler.FILE_ROOMS, rooms)
-    
     print("-" * 40)
-    print(f"SUCCESS: Room {assigned_room['room_id']} Reserved for {nights_int} nights.")
-    print(f"Total Price: RM {total_cost:.2f}")
+    print(f"SUCCESS: {len(group['rooms'])} rooms reserved for {days} nights.")
+    print(f"Rooms: {', '.join(group['rooms'])}")
+    print(f"Bookings: {group['bookings'][0]['booking_id']} to {group['bookings'][-1]['booking_id']}")
+    print(f"Total Price: RM {group['total']:.2f}")
     print("-" * 40)
-    
+
 
 # =========================
 # UPDATE GUEST
@@ -178,17 +155,11 @@ def update_guest():
     print("\n--- UPDATE GUEST INFO ---")
     search_id = input("Enter Guest ID to update (e.g., G1): ").strip()
     
-    guests = data_handler.read_data(data_handler.FILE_GUESTS)
-    target_guest = None
-    
     # 1. Find the guest by ID
-    for g in guests:
-        if g['guest_id'] == search_id:
-            target_guest = g
-            break
-            
-    if not target_guest:
-        print("Error: Guest ID not found.")
+    try:
+        target_guest = services.get_guest(search_id)
+    except services.NotFound as e:
+        print(f"Error: {e}")
         return
         
     print(f"Editing Guest: {target_guest['full_name']} (User: {target_guest['username']})")
@@ -204,20 +175,19 @@ def update_guest():
             print("Error: Invalid email format.type again.")
             new_email = input(f"New Email ({target_guest['email']}): ").strip()
 
-    new_pass = input(f"New Password ({target_guest['password']}): ").strip()
+    # Only the hash is stored, so the current password cannot be shown
+    new_pass = input("New Password (blank to keep): ").strip()
     if new_pass:
         while not data_handler.check_valid_password(new_pass):
             print("Error: Password must be at least 6 characters long.")
-            new_pass = input(f"New Password ({target_guest['password']}): ").strip()
-    # 3. Apply Updates
+            new_pass = input("New Password (blank to keep): ").strip()
+    # 3. Apply Updates and Save
     # We do NOT allow changing 'guest_id' or 'username' to prevent system errors
-    if new_name: target_guest['full_name'] = new_name
-    if new_phone: target_guest['phone'] = new_phone
-    if new_email: target_guest['email'] = new_email
-    if new_pass: target_guest['password'] = new_pass
-    
-    # 4. Save Changes
-    data_handler.save_data(data_handler.FILE_GUESTS, guests)
+    try:
+        services.update_guest(search_id, new_name, new_phone, new_email, new_pass)
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
     print(f"Success: Guest information for {search_id} updated.")
     
 
@@ -234,26 +204,12 @@ def check_in():
         # --- PATH A: PROCESS EXISTING RESERVATION ---
         booking_id = input("Enter Booking ID (e.g., B1): ").strip()
         
-        # Load Data
-        bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-        rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-        
-        # 1. Find the Booking
-        target_booking = None
-        for b in bookings:
-            if b['booking_id'] == booking_id:
-                target_booking = b
-                break
-        
-        if not target_booking:
-            print("Error: Booking ID not found.")
-            return
-            
-        # 2. Validate Status
-        # Only 'Confirmed' bookings can check in. 
-        # 'Active' means already here, 'Cancelled' is void.
-        if target_booking['status'] != 'Confirmed':
-            print(f"Error: Cannot check-in. Current status is '{target_booking['status']}'.")
+        # 1. Find the Booking and Validate Status
+        # Only 'Confirmed' bookings can check in.
+        try:
+            target_booking = services.booking_for_check_in(booking_id)
+        except services.ServiceError as e:
+            print(f"Error: {e}")
             return
 
         print(f"Reservation Found: {target_booking['guest_name']}")
@@ -264,23 +220,12 @@ def check_in():
             print("Check-in cancelled.")
             return
 
-        # 3. Update Booking Status
-        target_booking['status'] = 'Checked-in'
-        
-        # 4. Update Room Status (Reserved -> Occupied)
-        room_found = False
-        for r in rooms:
-            if r['room_id'] == target_booking['room_id']:
-                r['status'] = 'Occupied'
-                room_found = True
-                break
-        
-        if not room_found:
-            print("Warning: Room ID in booking not found in rooms.txt!")
-        
-        # 5. Save Changes
-        data_handler.save_data(data_handler.FILE_BOOKINGS, bookings)
-        data_handler.save_data(data_handler.FILE_ROOMS, rooms)
+        # 2. Update Booking (Checked-in) and Room (Reserved -> Occupied)
+        try:
+            services.check_in(booking_id)
+        except services.ServiceError as e:
+            print(f"Error: {e}")
+            return
         print(f"Success: Guest {target_booking['guest_name']} is now Checked-In.")
 
     elif has_booking == 'no':
@@ -299,72 +244,34 @@ def walk_in_check_in():
     
     # 1. Validate Guest
     guest_id = input("Enter Guest ID: ").strip()
-    guests = data_handler.read_data(data_handler.FILE_GUESTS)
-    
-    found_guest = None
-    for g in guests:
-        if g['guest_id'] == guest_id:
-            found_guest = g
-            break
-            
-    if not found_guest:
+    try:
+        services.get_guest(guest_id)
+    except services.NotFound:
         print("Error: Guest not found. Please register first.")
         return
 
     # 2. Select Room
     room_type = input("Enter Room Type: ").strip()
     days = input("Enter Nights: ").strip()
-    
-    if not days.isdigit():
+
+    # 3. Book and check in at once
+    # Booking and room are saved together so two terminals cannot give out the same room
+    try:
+        booking = services.walk_in(guest_id, room_type, days)
+    except services.InvalidInput:
         print("Error: Invalid number.")
         return
-        
-    nights_int = int(days)
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-    
-    assigned_room = None
-    room_price = 0.0
-    
-    for r in rooms:
-        if (r['type'].lower() == room_type.lower() and 
-            r['status'] == 'Available' and r['cleaning_status'] == 'Clean'):
-            assigned_room = r
-            room_price = float(r['price'])
-            break
-            
-    if not assigned_room:
+    except services.NoRoomAvailable:
         print("Error: No rooms available.")
         return
-
-    # 3. Calculations
-    now_obj = datetime.now()
-    check_in_str = now_obj.strftime("%Y-%m-%d")
-    check_out_obj = now_obj + timedelta(days=nights_int)
-    check_out_str = check_out_obj.strftime("%Y-%m-%d")
-    total_cost = room_price * nights_int
-
-    # 4. Save Data
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-    new_id = f"B{len(bookings) + 1}"
-    
-    new_booking = {
-        'booking_id': new_id,
-        'guest_name': found_guest['full_name'],
-        'guest_id': guest_id,
-        'room_id': assigned_room['room_id'],
-        'check_in': check_in_str,
-        'check_out': check_out_str,
-        'nights': days,
-        'status': 'Checked-in',
-        'total_price': f"{total_cost:.2f}"
-    }
-    
-    assigned_room['status'] = 'Occupied'
-    bookings.append(new_booking)
-    data_handler.save_data(data_handler.FILE_BOOKINGS, bookings)
-    data_handler.save_data(data_handler.FILE_ROOMS, rooms)
+    except services.SaveFailed:
+        print("Error: The room could not be assigned. Please try again.")
+        return
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
     
-    print(f"Walk-in Successful. Total to Pay: RM {total_cost:.2f}")
+    print(f"Walk-in Successful. Total to Pay: RM {booking['total_price']:.2f}")
 
  
 
@@ -377,89 +284,60 @@ def check_out():
     # 1. Input Room ID
     room_id = input("Enter Room ID to Checkout: ").strip()
     
-    # 2. Find Active Booking for this Room
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-    target_booking = None
-    
-    # We loop to find a booking for this room that is 'Active' or 'Checked-in'
-    for b in bookings:
-        if b['room_id'] == room_id and (b['status'] == 'Active' or b['status'] == 'Checked-in'):
-            target_booking = b
-            break
-            
-    if not target_booking:
-        print("Error: No active booking found for this room.")
+    # 2. Find Active Booking and work out Late Fees
+    try:
+        bill = services.check_out_bill(room_id)
+    except services.ServiceError as e:
+        print(f"Error: {e}")
         return
 
-    # 3. Get Room Price (Needed for Late Fee Calculation)
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-    room_price = 0.0
-    target_room = None
-    
-    for r in rooms:
-        if r['room_id'] == room_id:
-            target_room = r
-            room_price = float(r['price'])
-            break
-
-    # 4. Check for Late Fees
-    expected_checkout_str = target_booking['check_out']
-    today_obj = datetime.now()
-    today_str = today_obj.strftime("%Y-%m-%d")
-    
-    # Convert strings to Date Objects for math
-    # strptime parses "2025-12-05" into a date object
-    expected_date_obj = datetime.strptime(expected_checkout_str, "%Y-%m-%d")
-    
-    # Calculate difference
-    late_fee = 0.0
-    overdue_days = 0
-    
-    # If Today is AFTER Expected Date
-    if today_obj.date() > expected_date_obj.date():
-        delta = today_obj.date() - expected_date_obj.date()
-        overdue_days = delta.days
-        late_fee = overdue_days * room_price
-        
+    overdue_days = bill['overdue_days']
+    if overdue_days:
         print(f"\nALERT: Guest is overdue by {overdue_days} day(s)!")
-        print(f"Late Fee Applied: RM {late_fee:.2f} ({overdue_days} x RM {room_price})")
+        print(f"Late Fee Applied: RM {bill['late_fee']:.2f} ({overdue_days} x RM {bill['room_price']})")
 
-    # 5. Calculate Final Total
-    # Read current total (remove 'RM' or whitespace if present)
-    current_total = float(target_booking['total_price'])
-    final_total = current_total + late_fee
-    
     print("-" * 40)
-    print(f"Guest Name:     {target_booking['guest_name']}")
-    print(f"Original Total: RM {current_total:.2f}")
-    print(f"Late Fees:      RM {late_fee:.2f}")
-    print(f"FINAL TOTAL:    RM {final_total:.2f}")
+    print(f"Guest Name:     {bill['booking']['guest_name']}")
+    print(f"Original Total: RM {bill['original_total']:.2f}")
+    print(f"Late Fees:      RM {bill['late_fee']:.2f}")
+    print(f"FINAL TOTAL:    RM {bill['final_total']:.2f}")
     print("-" * 40)
     
     confirm = input("Confirm Check-out and Payment? (y/n): ").strip().lower()
     if confirm != 'y':
         return
 
-    # 6. Update Files
-    # Update Booking
-    target_booking['status'] = 'Checked-out'
-    target_booking['total_price'] = f"{final_total:.2f}"
-    # Optionally update the check_out date to today so history is accurate
-    target_booking['check_out'] = today_str 
-    
-    # Update Room (Set to Dirty so Housekeeping sees it)
-    if target_room:
-        target_room['status'] = 'Available'
-        target_room['cleaning_status'] = 'Dirty'
-
-    
-    data_handler.save_data(data_handler.FILE_BOOKINGS, bookings)
-    data_handler.save_data(data_handler.FILE_ROOMS, rooms)
+    # 3. Update Booking and Room (Set to Dirty so Housekeeping sees it)
+    try:
+        services.check_out(room_id)
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
     
     print(f"Success: Room {room_id} has been checked out.")
     print("Status: Available (Dirty) - Housekeeping notified.")
 
 
+def view_overdue_guests():
+    print("\n--- OVERDUE GUESTS ---")
+
+    # Every in-house guest past the check-out date, with the late fee so far
+    report = services.overdue_report()
+    if not report['stays']:
+        print("No guests are overdue.")
+        return
+
+    print(f"{'Room':<6} {'Booking':<8} {'Guest':<20} {'Check-Out':<12} {'Days':<5} {'Late Fee (RM)'}")
+    print("-" * 70)
+    for stay in report['stays']:
+        b = stay['booking']
+        print(f"{b['room_id']:<6} {b['booking_id']:<8} {b['guest_name'][:20]:<20} "
+              f"{str(b['check_out']):<12} {stay['overdue_days']:<5} {stay['late_fee']:.2f}")
+    print("-" * 70)
+    print(f"Overdue Stays: {len(report['stays'])}")
+    print(f"Late Fees So Far: RM {report['total']:.2f}")
+
+
 # =========================
 # CANCEL BOOKING
 # =========================
@@ -469,49 +347,31 @@ def cancel_booking():
     # 1. Input Booking ID
     booking_id = input("Enter Booking ID to Cancel (e.g., B1): ").strip()
     
-    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
-    
     # 2. Find the Booking
-    target_booking = None
-    for b in bookings:
-        if b['booking_id'] == booking_id:
-            target_booking = b
-            break
-            
-    if not target_booking:
-        print("Error: Booking ID not found.")
-        return
-
-    # 3. Simple Status Check
     # We ONLY allow cancelling 'Confirmed' bookings.
-    if target_booking['status'] not in ['Confirmed']:
-        print(f"Error: Cannot cancel this booking. Current status is '{target_booking['status']}'.")
+    try:
+        target_booking = services.booking_for_cancel(booking_id)
+    except services.InvalidState as e:
+        print(f"Error: {e}")
         print("You can only cancel reservations that have not arrived yet.")
         return
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
 
-    # 4. Confirmation
+    # 3. Confirmation
     print(f"Cancelling reservation for {target_booking['guest_name']} (Room {target_booking['room_id']}).")
     confirm = input("Are you sure? (y/n): ").strip().lower()
     
     if confirm != 'y':
         return
 
-    # 5. Process Cancellation
-    # Update Booking
-    target_booking['status'] = 'Cancelled'
-    target_booking['total_price'] = "0.00"
-    
-    # Update Room (Make it Available again)
-    for r in rooms:
-        if r['room_id'] == target_booking['room_id']:
-            r['status'] = 'Available'
-            # We don't change cleaning_status because the guest never entered the room.
-            break
-            
-    # 6. Save
-    data_handler.save_data(data_handler.FILE_BOOKINGS, bookings)
-    data_handler.save_data(data_handler.FILE_ROOMS, rooms)
+    # 4. Process Cancellation (the room becomes Available again)
+    try:
+        services.cancel_booking(booking_id)
+    except services.ServiceError as e:
+        print(f"Error: {e}")
+        return
     print("Success: Reservation cancelled. Room is now Available.")
 # =========================
 # VIEW ROOM AVAILABILITY
@@ -519,7 +379,8 @@ def cancel_booking():
 def view_room_availability():
     print("\n--- AVAILABLE ROOMS ---")
     
-    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    # We ONLY show rooms that are strictly 'Available' and 'Clean'
+    rooms = services.available_rooms()
     
     # Header
     print(f"{'ID':<8} {'Type':<12} {'Price':<10} {'Condition'}")
@@ -528,13 +389,11 @@ def view_room_availability():
     found_any = False
     
     for r in rooms:
-        # We ONLY show the room if the status is strictly 'Available' and 'Clean'
-        if r['status'] == 'Available' and r['cleaning_status'] == 'Clean':
-            condition = r['cleaning_status']
-            price = f"RM{float(r['price']):.0f}"
-            
-            print(f"{r['room_id']:<8} {r['type']:<12} {price:<10} {condition}")
-            found_any = True
+        condition = r['cleaning_status']
+        price = f"RM{float(r['price']):.0f}"
+        
+        print(f"{r['room_id']:<8} {r['type']:<12} {price:<10} {condition}")
+        found_any = True
 
     if not found_any:
         print("No rooms are currently available.")
@@ -0,0 +1,281 @@
+import argparse
+import asyncio
+import inspect
+import json
+import signal
+import time
+from datetime import date
+import data_handler
+import services
+
+# ------------------------------
+# Stay Hub server
+# One process keeps the tables in memory and serves every terminal or kiosk
+# over a local TCP socket, so they share one hot copy of the data instead of
+# each parsing the files. Saves are write-behind: changes are answered from
+# memory at once and written to disk together every few seconds.
+#
+# Protocol: one JSON object per line in each direction, e.g.
+#   -> {"op": "login", "args": {"username": "recept", "password": "..."}}
+#   <- {"ok": true, "result": {"role": "Receptionist", "user": {...}}}
+#   -> {"op": "book_room", "args": {"guest_id": "G1", "room_type": "Double", "nights": 2}}
+#   <- {"ok": true, "result": {"booking_id": "B15", ...}}
+#   <- {"ok": false, "error": "NoRoomAvailable", "message": "No clean 'Double' rooms available."}
+# Run from the project folder:
+#   python server.py --port 8765 --flush-interval 2
+# ------------------------------
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+FLUSH_INTERVAL = 2.0  # seconds between write-behind flushes
+
+STAFF = ("Manager", "Receptionist", "Accountant", "Housekeeping")
+
+# Operations clients can call and the roles allowed to call them.
+# A Guest's own guest_id is filled in by the server, so guests can only
+# book, list and cancel their own bookings.
+OPERATIONS = {
+    "available_rooms": (services.available_rooms, STAFF + ("Guest",)),
+    "find_free_room": (services.find_free_room, STAFF + ("Guest",)),
+    "free_rooms": (services.free_rooms, STAFF + ("Guest",)),
+    "ready_counts": (services.ready_counts, STAFF + ("Guest",)),
+    "quote": (services.quote, STAFF + ("Guest",)),
+    "quote_stays": (services.quote_stays, STAFF + ("Guest",)),
+    "get_room": (services.get_room, STAFF),
+    "book_room": (services.book_room, ("Receptionist", "Guest")),
+    "book_group": (services.book_group, ("Receptionist",)),
+    "guest_history": (services.guest_history, ("Receptionist", "Guest")),
+    "cancel_booking": (services.cancel_booking, ("Receptionist", "Guest")),
+    "get_guest": (services.get_guest, ("Receptionist",)),
+    "register_guest": (services.register_guest, ("Receptionist",)),
+    "update_guest": (services.update_guest, ("Receptionist",)),
+    "walk_in": (services.walk_in, ("Receptionist",)),
+    "get_booking": (services.get_booking, ("Receptionist", "Accountant", "Manager")),
+    "check_in": (services.check_in, ("Receptionist",)),
+    "check_out_bill": (services.check_out_bill, ("Receptionist",)),
+    "check_out": (services.check_out, ("Receptionist",)),
+    "overdue_report": (services.overdue_report, ("Receptionist", "Manager")),
+    "record_payment": (services.record_payment, ("Accountant",)),
+    "income_report": (services.income_report, ("Accountant", "Manager")),
+    "outstanding_report": (services.outstanding_report, ("Accountant", "Manager")),
+    "monthly_summary": (services.monthly_summary, ("Accountant", "Manager")),
+    "add_room": (services.add_room, ("Manager",)),
+    "update_room": (services.update_room, ("Manager",)),
+    "delete_room": (services.delete_room, ("Manager",)),
+    "system_summary": (services.system_summary, ("Manager",)),
+    "daily_report": (services.daily_report, ("Manager",)),
+    "monthly_report": (services.monthly_report, ("Manager",)),
+    "occupancy_forecast": (services.occupancy_forecast, ("Manager",)),
+    "rooms_to_clean": (services.rooms_to_clean, ("Housekeeping", "Manager")),
+    "rooms_in_maintenance": (services.rooms_in_maintenance, ("Housekeeping", "Manager")),
+    "mark_room_clean": (services.mark_room_clean, ("Housekeeping",)),
+    "resolve_maintenance": (services.resolve_maintenance, ("Housekeeping",)),
+}
+
+# Arguments the server fills in itself: "today" always comes from the
+# server's clock (late fees, check-in days), it is only passed in directly
+# by tests and batch replays through call_operation
+SERVER_ARGUMENTS = ("today",)
+
+# Arguments that arrive as 'YYYY-MM-DD' text but are dates in the services
+DATE_ARGUMENTS = ("start", "end", "today", "check_in", "check_out")
+
+# Signature of every operation, read once
+_SIGNATURES = {name: inspect.signature(fn) for name, (fn, _) in OPERATIONS.items()}
+
+# Server counters, e.g. {'requests': 120, 'errors': 3, 'connections': 4, 'flushes': 10}
+_stats = {"requests": 0, "errors": 0, "connections": 0, "flushes": 0, "flush_failures": 0}
+
+
+def to_json(value):
+    """Turns records, dates and nested results into JSON values (passwords are left out)."""
+    if isinstance(value, data_handler.Record):
+        return {k: to_json(v) for k, v in value.items() if k != "password"}
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def handle_request(session, request):
+    """
+    Runs one request for a connection and returns the response dictionary.
+    session holds the logged-in role and user, e.g. {'role': 'Guest', 'user': guest}.
+    """
+    op = request.get("op")
+    args = request.get("args") or {}
+    if not isinstance(args, dict):
+        return {"ok": False, "error": "InvalidInput", "message": "args must be an object."}
+
+    try:
+        if op == "login":
+            role, user = services.login(args.get("username", ""), args.get("password", ""))
+            session["role"], session["user"] = role, user
+            return {"ok": True, "result": {"role": role, "user": to_json(user)}}
+        if op == "logout":
+            session.clear()
+            return {"ok": True, "result": None}
+        if op == "stats":
+            return {"ok": True, "result": server_stats()}
+
+        if op not in OPERATIONS:
+            return {"ok": False, "error": "UnknownOperation", "message": f"Unknown operation '{op}'."}
+        roles = OPERATIONS[op][1]
+        role = session.get("role")
+        if role not in roles:
+            return {"ok": False, "error": "NotAllowed",
+                    "message": f"Operation '{op}' needs one of: {', '.join(roles)} (please login)."}
+
+        for name in SERVER_ARGUMENTS:
+            if name in args:
+                return {"ok": False, "error": "InvalidInput", "message": f"'{name}' is set by the server."}
+        if role == "Guest" and "guest_id" in _SIGNATURES[op].parameters:
+            args["guest_id"] = session["user"]["guest_id"]
+        return {"ok": True, "result": call_operation(op, args)}
+
+    except services.ServiceError as e:
+        return {"ok": False, "error": type(e).__name__, "message": str(e)}
+    except Exception as e:
+        # A request the services did not expect must not close the connection
+        # (or stop the server), it is answered like a malformed line
+        return {"ok": False, "error": "BadRequest", "message": f"Operation '{op}' failed: {type(e).__name__}: {e}"}
+
+
+def call_operation(op, args):
+    """
+    Runs one of the OPERATIONS with JSON arguments (no role check) and
+    returns its result as JSON values. Raises ServiceError when it is refused.
+    """
+    try:
+        _SIGNATURES[op].bind(**args)
+    except TypeError as e:
+        # Missing or unknown arguments
+        raise services.InvalidInput(f"{op}: {e}.")
+    for name in DATE_ARGUMENTS:
+        if isinstance(args.get(name), str):
+            if not data_handler.is_valid_date(args[name]):
+                raise services.InvalidInput(f"{name} must use the YYYY-MM-DD format.")
+            args[name] = date.fromisoformat(args[name])
+    return to_json(OPERATIONS[op][0](**args))
+
+
+def server_stats():
+    """Request, cache, write-behind and lock counters of the running server."""
+    stats = dict(_stats)
+    stats["pending_writes"] = data_handler.pending_writes()
+    stats["cache"] = data_handler.cache_stats()
+    stats["locks"] = data_handler.lock_stats()
+    return stats
+
+
+async def serve_client(reader, writer):
+    """Answers the JSON lines of one connection until it closes."""
+    _stats["connections"] += 1
+    session = {}
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            _stats["requests"] += 1
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError
+            except ValueError:
+                response = {"ok": False, "error": "BadRequest", "message": "Each line must be a JSON object."}
+            else:
+                # Requests run one at a time on the event loop, so the
+                # in-memory tables never see two changes at once
+                response = handle_request(session, request)
+                if "id" in request:
+                    response["id"] = request["id"]
+            if not response["ok"]:
+                _stats["errors"] += 1
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        _stats["connections"] -= 1
+        writer.close()
+
+
+def flush():
+    """Writes the pending tables, keeping count of failures."""
+    if not data_handler.pending_writes():
+        return
+    _stats["flushes"] += 1
+    if not data_handler.flush_writes():
+        _stats["flush_failures"] += 1
+
+
+async def flush_periodically(interval):
+    """Write-behind: writes the changed tables every interval seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        flush()
+
+
+def warm_up():
+    """Loads every table (and the account index) once before clients connect."""
+    started = time.perf_counter()
+    for filename in (data_handler.FILE_ROOMS, data_handler.FILE_BOOKINGS,
+                     data_handler.FILE_PAYMENTS, data_handler.FILE_GUESTS, data_handler.FILE_USERS):
+        data_handler.read_data(filename)
+    data_handler.find_account("")
+    return time.perf_counter() - started
+
+
+async def run_server(host, port, interval):
+    data_handler.set_write_behind(True)
+    seconds = warm_up()
+    server = await asyncio.start_server(serve_client, host, port)
+    print(f"Stay Hub server listening on {host}:{port} (tables loaded in {seconds:.2f}s, "
+          f"writes every {interval}s)")
+    flusher = asyncio.ensure_future(flush_periodically(interval))
+
+    # Ctrl+C or "kill" stop the server cleanly (Windows raises KeyboardInterrupt instead)
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        flusher.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stay Hub hotel server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--flush-interval", type=float, default=FLUSH_INTERVAL,
+                        help="seconds between writes of the changed tables")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_server(args.host, args.port, args.flush_interval))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error: Unable to start the server - {e}")
+    finally:
+        # Nothing saved in memory is lost on Ctrl+C
+        if data_handler.set_write_behind(False):
+            print("Server stopped. All changes are saved.")
+        else:
+            print(f"Error: Server stopped but the changes to "
+                  f"{', '.join(data_handler.pending_writes())} could not be saved.")
+
+
+if __name__ == "__main__":
+    main()
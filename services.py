@@ -0,0 +1,999 @@
+import itertools
+import os
+from datetime import datetime, date, timedelta
+import data_handler
+
+# ------------------------------
+# Service layer
+# Every hotel operation as a plain function: arguments in, a record (or a
+# report dictionary) out, and a ServiceError when the operation is refused.
+# Nothing here calls input() or print(), so the menus, scripts and
+# benchmarks all share the same rules, e.g.
+#   booking = services.book_room("G1", "Double", 3)
+#   services.check_in(booking['booking_id'])
+# (Saving still prints data_handler's "Success: Data saved to ..." lines.)
+# ------------------------------
+
+ROOM_TYPES = data_handler.ROOM_TYPES
+ROOM_STATUSES = data_handler.ROOM_STATUSES
+CLEANING_STATUSES = data_handler.CLEANING_STATUSES
+PAYMENT_METHODS = data_handler.PAYMENT_METHODS
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MAX_NIGHTS = 365  # longest stay that can be booked or quoted at once
+
+
+# --- ERRORS ---
+# str(error) is a message that can be shown to the user as it is
+class ServiceError(Exception):
+    """Base class of the errors raised when an operation is refused."""
+
+
+class NotFound(ServiceError):
+    """The guest, room or booking does not exist."""
+
+
+class InvalidInput(ServiceError):
+    """A value is missing or has the wrong format."""
+
+
+class AlreadyExists(ServiceError):
+    """The username or IC/Passport is already registered."""
+
+
+class InvalidState(ServiceError):
+    """The booking or room has the wrong status for the operation."""
+
+
+class NoRoomAvailable(ServiceError):
+    """There is no clean, available room of the requested type."""
+
+
+class LoginFailed(ServiceError):
+    """The username and password do not match an account."""
+
+
+class SaveFailed(ServiceError):
+    """The change could not be written (e.g. another terminal changed the same rows)."""
+
+
+def _save(*changes):
+    """Saves (filename, table) pairs together, or raises SaveFailed."""
+    if not data_handler.save_tables(list(changes)):
+        raise SaveFailed("The changes could not be saved. Please try again.")
+
+
+def _today(today):
+    """The given date, or the current date."""
+    return today if today is not None else datetime.now().date()
+
+
+def _as_number(value, name, largest=MAX_NIGHTS):
+    """A whole number from 0 to largest, from an int or digit text, or InvalidInput."""
+    text = value.strip() if isinstance(value, str) else str(value) if type(value) is int else ""
+    if not text.isdecimal():
+        raise InvalidInput(f"{name} must be a number.")
+    if int(text) > largest:
+        raise InvalidInput(f"{name} cannot be more than {largest}.")
+    return int(text)
+
+
+def _as_date(value, name):
+    """A date from a date object or 'YYYY-MM-DD' text, or InvalidInput."""
+    if isinstance(value, date):
+        return value
+    if not data_handler.is_valid_date(value):
+        raise InvalidInput(f"{name} must use the YYYY-MM-DD format.")
+    return date.fromisoformat(value)
+
+
+def _find(table, id_field, id_value, message):
+    """Looks a record up by ID, or raises NotFound(message)."""
+    record = data_handler.find_record_by_id(table, id_field, id_value)
+    if not record:
+        raise NotFound(message)
+    return record
+
+
+# --- ACCOUNTS ---
+def login(username, password):
+    """Returns (role, record) of the account, e.g. ('Guest', guest)."""
+    role, user = data_handler.authenticate(username, password)
+    if not role:
+        raise LoginFailed("Invalid Username or Password.")
+    return role, user
+
+
+def get_guest(guest_id):
+    """Returns the guest record with this ID."""
+    guests = data_handler.read_data(data_handler.FILE_GUESTS)
+    return _find(guests, 'guest_id', guest_id, "Guest ID not found.")
+
+
+def register_guest(full_name, ic_passport, phone, email, username, password):
+    """Creates a guest account and returns the new Guest record."""
+    if not full_name or not ic_passport or not username or not password:
+        raise InvalidInput("All fields (Name, IC, Username, Password) are required.")
+    if not data_handler.check_valid_email(email):
+        raise InvalidInput("Invalid email format.")
+    if not data_handler.check_valid_password(password):
+        raise InvalidInput("Password must be at least 6 characters long.")
+
+    # Usernames are shared with the staff accounts, so check both at once
+    if data_handler.find_account(username):
+        raise AlreadyExists("Username already taken!")
+    guests = data_handler.read_data(data_handler.FILE_GUESTS)
+    for g in guests:
+        if g['ic_passport'] == ic_passport:
+            raise AlreadyExists("Guest with this IC/Passport already registered!")
+
+    guest = data_handler.Guest.from_mapping({
+        'guest_id': data_handler.next_id(data_handler.FILE_GUESTS),
+        'username': username,
+        'password': data_handler.hash_password(password),
+        'full_name': full_name,
+        'phone': phone,
+        'ic_passport': ic_passport,
+        'email': email,
+    })
+    guests.append(guest)
+    _save((data_handler.FILE_GUESTS, guests))
+    return guest
+
+
+def update_guest(guest_id, full_name=None, phone=None, email=None, password=None):
+    """
+    Changes the given fields of a guest (None or "" keeps the current value)
+    and returns the record. The guest ID and username cannot be changed.
+    """
+    guests = data_handler.read_data(data_handler.FILE_GUESTS)
+    guest = _find(guests, 'guest_id', guest_id, "Guest ID not found.")
+    if email and not data_handler.check_valid_email(email):
+        raise InvalidInput("Invalid email format.")
+    if password and not data_handler.check_valid_password(password):
+        raise InvalidInput("Password must be at least 6 characters long.")
+
+    if full_name: guest['full_name'] = full_name
+    if phone: guest['phone'] = phone
+    if email: guest['email'] = email
+    if password: guest['password'] = data_handler.hash_password(password)
+    _save((data_handler.FILE_GUESTS, guests))
+    return guest
+
+
+# --- ROOMS ---
+# A room can be booked for [check_in, check_out) when no Confirmed or
+# Checked-in booking of it overlaps those nights (the "stays_by_room"
+# interval index of the bookings table). A stay starting today also needs
+# the room to be Available and Clean right now, so it is taken from the
+# "ready_by_type" pool of the rooms table instead of scanning every room;
+# rooms in Maintenance are never offered. A guest still checked in after
+# their check-out date has no known end to the stay, so their room is not
+# offered for any date until they check out.
+def _is_ready(room):
+    """True when a guest could walk into the room right now."""
+    return room['status'] == 'Available' and room['cleaning_status'] == 'Clean'
+
+
+def _is_overdue(booking, today):
+    """True when an in-house booking should have checked out before today."""
+    return isinstance(booking['check_out'], date) and booking['check_out'] < today
+
+
+def _is_free(bookings, room, start, end, today):
+    """True when the room can be booked for every night from start up to end."""
+    if room['status'] == 'Maintenance':
+        return False
+    if start <= today and not _is_ready(room):
+        return False
+    if any(_is_overdue(b, today) for b in bookings.lookup('active_by_room', room['room_id'])):
+        return False
+    return not bookings.overlapping('stays_by_room', room['room_id'], start, end)
+
+
+def _room_type(room_type):
+    """The room type as spelled in ROOM_TYPES (the type ignores letter case)."""
+    if not isinstance(room_type, str):
+        raise InvalidInput("Room type must be text.")
+    for known in ROOM_TYPES:
+        if known.lower() == room_type.lower():
+            return known
+    return room_type
+
+
+def _rooms_of_type(rooms, room_type, ready=False):
+    """The rooms of a type, or only its ready (Available and Clean) pool."""
+    return rooms.lookup('ready_by_type' if ready else 'by_type', _room_type(room_type))
+
+
+def _held_tonight(bookings, today):
+    """
+    Rooms kept for a reservation tonight although they are still Available:
+    advance bookings whose check-in day has come but who have not arrived.
+    """
+    return {b['room_id'] for b in bookings.lookup('by_status', 'Confirmed')
+            if isinstance(b['check_in'], date) and b['check_in'] <= today < b['check_out']}
+
+
+def available_rooms(today=None):
+    """Returns the rooms that are Available, Clean and not booked for tonight."""
+    today = _today(today)
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    held = _held_tonight(bookings, today)
+    return [r for room_type in rooms.lookup_counts('ready_by_type')
+            for r in rooms.lookup('ready_by_type', room_type) if r['room_id'] not in held]
+
+
+def ready_counts(today=None):
+    """
+    Returns how many rooms of each type could be given out tonight, e.g.
+    {'Single': 4, 'Double': 0, 'Deluxe': 1}, from the size of each ready pool.
+    """
+    today = _today(today)
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    counts = dict.fromkeys(ROOM_TYPES, 0)
+    counts.update(rooms.lookup_counts('ready_by_type'))
+    for room_id in _held_tonight(bookings, today):
+        room = rooms.get_by_key(room_id)
+        if room is not None and _is_ready(room):
+            counts[room['type']] -= 1
+    return counts
+
+
+def free_rooms(room_type, check_in, check_out, today=None):
+    """
+    Returns the rooms of a type that are free every night from check_in
+    up to check_out, e.g. free_rooms("Double", "2026-03-01", "2026-03-04").
+    """
+    today = _today(today)
+    check_in = _as_date(check_in, "check_in")
+    check_out = _as_date(check_out, "check_out")
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    return [r for r in _rooms_of_type(rooms, room_type)
+            if _is_free(bookings, r, check_in, check_out, today)]
+
+
+def get_room(room_id):
+    """Returns the room record with this ID."""
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    return _find(rooms, 'room_id', room_id, "Room ID not found.")
+
+
+def _free_rooms_of_type(rooms, bookings, room_type, start, end, today):
+    """The rooms of a type that are free from start up to end, one at a time."""
+    # From today only the ready pool can take the guest
+    for r in _rooms_of_type(rooms, room_type, ready=start <= today):
+        if _is_free(bookings, r, start, end, today):
+            yield r
+
+
+def _free_room(rooms, bookings, room_type, start, end, today):
+    """The first room of a type that is free from start up to end."""
+    for r in _free_rooms_of_type(rooms, bookings, room_type, start, end, today):
+        return r
+    if start <= today:
+        raise NoRoomAvailable(f"No clean '{room_type}' rooms available.")
+    raise NoRoomAvailable(f"No '{room_type}' rooms free from {start} to {end}.")
+
+
+def find_free_room(room_type, check_in=None, nights=1, today=None):
+    """Returns the room a booking of this type would get, e.g. to quote its price."""
+    today = _today(today)
+    start = today if check_in is None else _as_date(check_in, "check_in")
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    end = start + timedelta(days=_as_number(nights, "Nights"))
+    return _free_room(rooms, bookings, room_type, start, end, today)
+
+
+def add_room(room_type, price):
+    """Adds an Available, Clean room and returns the new Room record."""
+    if room_type not in ROOM_TYPES:
+        raise InvalidInput("Invalid room type. Please enter Single, Double, or Deluxe.")
+    if not data_handler.is_valid_price(price):
+        raise InvalidInput("Price must be a valid positive number.")
+
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    room = data_handler.Room.from_mapping({
+        'room_id': data_handler.next_id(data_handler.FILE_ROOMS),
+        'type': room_type,
+        'price': price,
+        'status': 'Available',
+        'cleaning_status': 'Clean',
+    })
+    rooms.append(room)
+    _save((data_handler.FILE_ROOMS, rooms))
+    return room
+
+
+def update_room(room_id, room_type=None, price=None, status=None, cleaning_status=None):
+    """Changes the given fields of a room (None or "" keeps the current value)."""
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    room = _find(rooms, 'room_id', room_id, "Room ID not found.")
+    if room_type and room_type not in ROOM_TYPES:
+        raise InvalidInput("Invalid room type. Please enter Single, Double, or Deluxe.")
+    if price and not data_handler.is_valid_price(price):
+        raise InvalidInput("Price must be a valid positive number.")
+    if status and status not in ROOM_STATUSES:
+        raise InvalidInput("Status must be Available, Occupied, Maintenance, or Reserved.")
+    if cleaning_status and cleaning_status not in CLEANING_STATUSES:
+        raise InvalidInput("Cleaning status must be Clean or Dirty.")
+
+    if room_type: room['type'] = room_type
+    if price: room['price'] = price
+    if status: room['status'] = status
+    if cleaning_status: room['cleaning_status'] = cleaning_status
+    _save((data_handler.FILE_ROOMS, rooms))
+    return room
+
+
+def delete_room(room_id):
+    """Removes a room from rooms.txt."""
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    new_rooms = [r for r in rooms if r['room_id'] != room_id]
+    if len(rooms) == len(new_rooms):
+        raise NotFound("Room ID not found.")
+    _save((data_handler.FILE_ROOMS, new_rooms))
+
+
+def rooms_to_clean():
+    """Returns the rooms whose cleaning status is not Clean."""
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    return [room for room in rooms if room["cleaning_status"] != "Clean"]
+
+
+def rooms_in_maintenance():
+    """Returns the rooms whose status is Maintenance."""
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    return rooms.lookup('by_status', 'Maintenance')
+
+
+def mark_room_clean(room_id):
+    """Sets a Dirty room to Clean and returns it."""
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    room = _find(rooms, 'room_id', room_id, "Room ID not found.")
+    if room["cleaning_status"] != "Dirty":
+        raise InvalidState("This room is already clean.")
+    room["cleaning_status"] = "Clean"
+    _save((data_handler.FILE_ROOMS, rooms))
+    return room
+
+
+def resolve_maintenance(room_id):
+    """Puts a room in Maintenance back to Available (it still needs cleaning)."""
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    room = _find(rooms, 'room_id', room_id, f"Room ID {room_id} does not exist.")
+    if room["status"] != "Maintenance":
+        raise InvalidState(f"Room {room_id} is not currently in Maintenance.")
+    room["status"] = "Available"
+    room["cleaning_status"] = "Dirty"
+    _save((data_handler.FILE_ROOMS, rooms))
+    return room
+
+
+# --- PRICES ---
+# The rate calendar (rates.txt) is turned into two running totals per room
+# type, one entry per night from its first to its last rate:
+#   paid[n]  -> sum of the calendar prices of the nights before night n
+#   rated[n] -> how many of those nights have a calendar price
+# so any stay costs two subtractions, whatever its length:
+#   calendar part + room price * (nights without a calendar price)
+# Example: {'Deluxe': (date(2026, 12, 20), [0, 350, 700, ...], [0, 1, 2, ...])}
+# They are kept with the rate lines they were built from, e.g. ([['RT1', ...], ...], totals)
+_rate_calendar = (None, {})
+
+
+def _rate_totals():
+    """The running totals of every room type, rebuilt when rates.txt changes."""
+    global _rate_calendar
+    if not os.path.exists(data_handler.FILE_RATES):
+        return {}
+    rates = data_handler.read_data(data_handler.FILE_RATES)
+    # rates.txt is short, so comparing its lines is cheap; unlike the table
+    # object they also change when a rate is edited and saved in memory
+    signature = [r.to_values() for r in rates]
+    if _rate_calendar[0] == signature:
+        return _rate_calendar[1]
+
+    totals = {}
+    for room_type in {_room_type(r['room_type']) for r in rates}:
+        lines = [r for r in rates if _room_type(r['room_type']) == room_type
+                 and isinstance(r['start'], date) and isinstance(r['end'], date)
+                 and isinstance(r['price'], float)]
+        if not lines:
+            continue
+        first = min(r['start'] for r in lines)
+        nightly = [None] * (max(r['end'] for r in lines) - first).days
+        for r in lines:
+            days = {day[:3].title() for day in r['days'].split()}
+            for n in range((r['start'] - first).days, (r['end'] - first).days):
+                if 'All' in days or WEEKDAYS[(first + timedelta(days=n)).weekday()] in days:
+                    nightly[n] = r['price']
+        paid = list(itertools.accumulate((p or 0.0 for p in nightly), initial=0.0))
+        rated = list(itertools.accumulate((p is not None for p in nightly), initial=0))
+        totals[room_type] = (first, paid, rated)
+    _rate_calendar = (signature, totals)
+    return totals
+
+
+def _stay_price(totals, room_type, base_price, check_in_date, nights):
+    """Price of a stay from the running totals (base_price for nights without a rate)."""
+    if room_type not in totals:
+        return base_price * nights
+    first, paid, rated = totals[room_type]
+    last = len(paid) - 1
+    # Nights outside the calendar have no rate
+    start = min(max((check_in_date - first).days, 0), last)
+    end = min(max((check_in_date - first).days + nights, 0), last)
+    return (paid[end] - paid[start]) + base_price * (nights - (rated[end] - rated[start]))
+
+
+def room_price(room, check_in_date, nights):
+    """Returns what the room costs for nights from check_in_date, with the rate calendar."""
+    return _stay_price(_rate_totals(), _room_type(room['type']), float(room['price']),
+                       check_in_date, _as_number(nights, "Nights"))
+
+
+def quote(room_type, check_in=None, nights=1, today=None):
+    """
+    Returns the room a booking would get and its price, e.g.
+    quote("Deluxe", "2026-12-24", 3) -> {'room': ..., 'check_in': ...,
+    'nights': 3, 'total': 1050.0, 'per_night': 350.0}
+    """
+    nights = _as_number(nights, "Nights")
+    today = _today(today)
+    check_in_date = today if check_in is None else _as_date(check_in, "check_in")
+    room = find_free_room(room_type, check_in_date, nights, today)
+    total = room_price(room, check_in_date, nights)
+    return {'room': room, 'check_in': check_in_date, 'nights': nights,
+            'total': total, 'per_night': total / nights if nights else float(room['price'])}
+
+
+def quote_stays(room_type, stays):
+    """
+    Prices many candidate stays of a room type at once (e.g. for a kiosk
+    search) from the cheapest room of the type, without checking
+    availability. stays is a list of (check_in, nights), e.g.
+    quote_stays("Double", [("2026-03-01", 2), ("2026-03-02", 2)]) -> [300.0, 340.0]
+    """
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    of_type = _rooms_of_type(rooms, room_type)
+    if not of_type:
+        raise NotFound(f"No '{room_type}' rooms in the hotel.")
+    base_price = min(float(r['price']) for r in of_type)
+    totals = _rate_totals()
+    room_type = _room_type(room_type)
+    prices = []
+    for stay in stays:
+        if not isinstance(stay, (list, tuple)) or len(stay) != 2:
+            raise InvalidInput("Each stay must be a (check_in, nights) pair.")
+        check_in, nights = stay
+        prices.append(_stay_price(totals, room_type, base_price, _as_date(check_in, "check_in"),
+                                  _as_number(nights, "Nights")))
+    return prices
+
+
+# --- BOOKINGS ---
+def get_booking(booking_id, include_archive=False):
+    """Returns a booking by ID (optionally also looking in the archive)."""
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    booking = data_handler.find_record_by_id(bookings, 'booking_id', booking_id)
+    if not booking and include_archive:
+        archived = data_handler.iter_archive(
+            data_handler.FILE_BOOKINGS, predicate=lambda b: b['booking_id'] == booking_id)
+        booking = next(archived, None)
+    if not booking:
+        raise NotFound("Booking ID not found.")
+    return booking
+
+
+def _stay_dates(nights, check_in, today):
+    """Checks a stay and returns (nights, check-in date, check-out date)."""
+    nights = _as_number(nights, "Nights")
+    check_in_date = today if check_in is None else _as_date(check_in, "check_in")
+    if check_in_date < today:
+        raise InvalidInput("The check-in date cannot be in the past.")
+    return nights, check_in_date, check_in_date + timedelta(days=nights)
+
+
+def _new_booking(booking_id, guest, room, nights, check_in_date, check_out_date, status):
+    """The Booking record of one room for a guest."""
+    total_cost = room_price(room, check_in_date, nights)
+    return data_handler.Booking.from_mapping({
+        'booking_id': booking_id,
+        'guest_name': guest['full_name'],
+        'guest_id': guest['guest_id'],
+        'room_id': room['room_id'],
+        'check_in': check_in_date,
+        'check_out': check_out_date,
+        'nights': nights,
+        'status': status,
+        'total_price': f"{total_cost:.2f}",
+    })
+
+
+def _create_booking(guest_id, room_type, nights, booking_status, room_status, today, check_in=None,
+                    room_id=None, quoted_total=None):
+    """
+    Gives the guest a free room of the type and saves booking and room together.
+    With room_id (e.g. the room of a quote) only that room is booked, and
+    with quoted_total the booking is refused if the stay now costs more or less.
+    """
+    guests = data_handler.read_data(data_handler.FILE_GUESTS)
+    guest = _find(guests, 'guest_id', guest_id, "Guest ID not found. Please register first.")
+    today = _today(today)
+    nights, check_in_date, check_out_date = _stay_dates(nights, check_in, today)
+
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    if room_id is None:
+        room = _free_room(rooms, bookings, room_type, check_in_date, check_out_date, today)
+    else:
+        room = rooms.get_by_key(room_id)
+        if (room is None or room['type'] != _room_type(room_type)
+                or not _is_free(bookings, room, check_in_date, check_out_date, today)):
+            raise NoRoomAvailable(f"Room {room_id} is no longer free from {check_in_date} to {check_out_date}.")
+    if quoted_total is not None:
+        try:
+            quoted_total = float(quoted_total)
+        except (TypeError, ValueError):
+            raise InvalidInput("The quoted total must be a number.")
+        total = room_price(room, check_in_date, nights)
+        if round(total, 2) != round(quoted_total, 2):
+            raise InvalidState(f"The price of this stay changed to RM {total:.2f}. Please check it again.")
+    booking = _new_booking(data_handler.next_id(data_handler.FILE_BOOKINGS), guest, room,
+                           nights, check_in_date, check_out_date, booking_status)
+
+    # Booking and room are saved together: if another terminal took the same
+    # room in the meantime nothing is saved and no booking is created.
+    # Only a stay starting today changes the room now; later stays keep
+    # their nights through the bookings' interval index.
+    if check_in_date == today:
+        room['status'] = room_status
+    bookings.append(booking)
+    _save((data_handler.FILE_BOOKINGS, bookings), (data_handler.FILE_ROOMS, rooms))
+    return booking
+
+
+def book_room(guest_id, room_type, nights, today=None, check_in=None, room_id=None, quoted_total=None):
+    """
+    Reserves a room for the guest from check_in (default today, or any
+    later date) and returns the Confirmed Booking. Pass the room_id and
+    total of a quote to book exactly what the guest agreed to.
+    """
+    return _create_booking(guest_id, room_type, nights, 'Confirmed', 'Reserved', today, check_in,
+                           room_id, quoted_total)
+
+
+def walk_in(guest_id, room_type, nights, today=None):
+    """Books and checks in a guest without a reservation; returns the Booking."""
+    return _create_booking(guest_id, room_type, nights, 'Checked-in', 'Occupied', today)
+
+
+def book_group(guest_id, room_counts, nights, today=None, check_in=None):
+    """
+    Reserves several rooms at once for a group (all or nothing), e.g.
+    book_group("G3", {"Double": 20, "Single": 5}, 2) -> {'bookings': [...],
+    'rooms': ['R4', ...], 'total': 9800.0}. Every room gets its own
+    Confirmed booking under the group's guest ID.
+    """
+    guests = data_handler.read_data(data_handler.FILE_GUESTS)
+    guest = _find(guests, 'guest_id', guest_id, "Guest ID not found. Please register first.")
+    today = _today(today)
+    nights, check_in_date, check_out_date = _stay_dates(nights, check_in, today)
+
+    # 1. Add up the counts per room type ("double" and "Double" are one type)
+    if not isinstance(room_counts, dict):
+        raise InvalidInput("The rooms must be given as {room type: count}.")
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    wanted = {}
+    for room_type, count in room_counts.items():
+        count = _as_number(count, f"The number of '{room_type}' rooms", largest=len(rooms))
+        if count == 0:
+            raise InvalidInput(f"The number of '{room_type}' rooms must be a positive number.")
+        wanted[_room_type(room_type)] = wanted.get(_room_type(room_type), 0) + count
+    if not wanted:
+        raise InvalidInput("A group booking needs at least one room.")
+
+    # 2. Pick every room before changing anything, so a missing room leaves no bookings behind
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    chosen = []
+    for room_type, count in wanted.items():
+        free = _free_rooms_of_type(rooms, bookings, room_type, check_in_date, check_out_date, today)
+        found = list(itertools.islice(free, count))
+        if len(found) < count:
+            raise NoRoomAvailable(f"Only {len(found)} '{room_type}' rooms are free for those dates, "
+                                  f"{count} requested.")
+        chosen += found
+
+    # 3. One block of booking IDs and one save for the whole group
+    booking_ids = data_handler.reserve_ids(data_handler.FILE_BOOKINGS, len(chosen))
+    new_bookings = [_new_booking(booking_id, guest, room, nights, check_in_date, check_out_date, 'Confirmed')
+                    for booking_id, room in zip(booking_ids, chosen)]
+    if check_in_date == today:
+        for room in chosen:
+            room['status'] = 'Reserved'
+    bookings.extend(new_bookings)
+    _save((data_handler.FILE_BOOKINGS, bookings), (data_handler.FILE_ROOMS, rooms))
+    return {
+        'bookings': new_bookings,
+        'rooms': [room['room_id'] for room in chosen],
+        'total': sum(b['total_price'] for b in new_bookings),
+    }
+
+
+def _check_in_booking(bookings, booking_id, today):
+    """The booking if it can check in (only 'Confirmed' ones from their check-in date)."""
+    booking = _find(bookings, 'booking_id', booking_id, "Booking ID not found.")
+    # 'Active' means already here, 'Cancelled' is void
+    if booking['status'] != 'Confirmed':
+        raise InvalidState(f"Cannot check-in. Current status is '{booking['status']}'.")
+    if isinstance(booking['check_in'], date) and booking['check_in'] > today:
+        raise InvalidState(f"Cannot check-in before the reserved date {booking['check_in']}.")
+    return booking
+
+
+def booking_for_check_in(booking_id, today=None):
+    """Returns the reservation to check in, e.g. to show it before confirming."""
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    return _check_in_booking(bookings, booking_id, _today(today))
+
+
+def check_in(booking_id, today=None):
+    """Checks in a Confirmed reservation (its room becomes Occupied)."""
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    booking = _check_in_booking(bookings, booking_id, _today(today))
+
+    # The room must be empty: not Occupied and no other guest still checked in
+    room = data_handler.find_record_by_id(rooms, 'room_id', booking['room_id'])
+    in_house = [b['booking_id'] for b in bookings.lookup('active_by_room', booking['room_id']) if b is not booking]
+    if in_house:
+        raise InvalidState(f"Room {booking['room_id']} is still occupied by booking {in_house[0]}.")
+    if room and room['status'] == 'Occupied':
+        raise InvalidState(f"Room {booking['room_id']} is still Occupied.")
+
+    booking['status'] = 'Checked-in'
+    if room:
+        room['status'] = 'Occupied'
+    _save((data_handler.FILE_BOOKINGS, bookings), (data_handler.FILE_ROOMS, rooms))
+    return booking
+
+
+def overdue_charge(booking, room_price, today):
+    """
+    Returns (overdue_days, late_fee) for a guest still in the room on today:
+    every day after the booked check_out date costs one more night.
+    """
+    expected = booking['check_out']
+    if today > expected:
+        overdue_days = (today - expected).days
+        return overdue_days, overdue_days * room_price
+    return 0, 0.0
+
+
+def _check_out_bill(bookings, rooms, room_id, today):
+    """The bill of the room's active booking, see check_out_bill."""
+    # The "active_by_room" index holds the 'Active' or 'Checked-in' booking of each room
+    active_bookings = bookings.lookup('active_by_room', room_id)
+    if not active_bookings:
+        raise NotFound("No active booking found for this room.")
+    booking = active_bookings[0]
+
+    room = data_handler.find_record_by_id(rooms, 'room_id', room_id)
+    room_price = float(room['price']) if room else 0.0
+    overdue_days, late_fee = overdue_charge(booking, room_price, today)
+    original_total = float(booking['total_price'])
+    return {
+        'booking': booking,
+        'room': room,
+        'room_price': room_price,
+        'overdue_days': overdue_days,
+        'late_fee': late_fee,
+        'original_total': original_total,
+        'final_total': original_total + late_fee,
+    }
+
+
+def check_out_bill(room_id, today=None):
+    """
+    Returns what checking out the room would cost, e.g.
+    {'booking': ..., 'room': ..., 'room_price': 150.0, 'overdue_days': 1,
+     'late_fee': 150.0, 'original_total': 300.0, 'final_total': 450.0}
+    """
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    return _check_out_bill(bookings, rooms, room_id, _today(today))
+
+
+def overdue_report(today=None):
+    """
+    Returns every in-house stay past its check_out date with the late fee
+    it owes so far (the same rule as check_out, see overdue_charge), e.g.
+    {'date': ..., 'stays': [{'booking': ..., 'room_price': 150.0,
+     'overdue_days': 2, 'late_fee': 300.0}, ...], 'total': 300.0}
+    Longest overdue first.
+    """
+    today = _today(today)
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+
+    # One pass over the in-house bookings of the status index; their
+    # check_out column is already a date, so nothing is parsed here
+    stays = []
+    for status in ('Checked-in', 'Active'):
+        for booking in bookings.lookup('by_status', status):
+            if not _is_overdue(booking, today):
+                continue
+            room = rooms.get_by_key(booking['room_id'])
+            room_price = float(room['price']) if room else 0.0
+            overdue_days, late_fee = overdue_charge(booking, room_price, today)
+            stays.append({'booking': booking, 'room_price': room_price,
+                          'overdue_days': overdue_days, 'late_fee': late_fee})
+    stays.sort(key=lambda stay: (-stay['overdue_days'], stay['booking']['room_id']))
+    return {'date': today, 'stays': stays, 'total': sum(stay['late_fee'] for stay in stays)}
+
+
+def check_out(room_id, today=None):
+    """
+    Checks out the room's active booking, charging the late fee, and
+    returns the bill (see check_out_bill). The room becomes Available
+    but Dirty so housekeeping sees it.
+    """
+    today = _today(today)
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    bill = _check_out_bill(bookings, rooms, room_id, today)
+
+    booking, room = bill['booking'], bill['room']
+    booking['status'] = 'Checked-out'
+    booking['total_price'] = f"{bill['final_total']:.2f}"
+    # The check_out date becomes today so the history is accurate
+    booking['check_out'] = today
+    if room:
+        room['status'] = 'Available'
+        room['cleaning_status'] = 'Dirty'
+    _save((data_handler.FILE_BOOKINGS, bookings), (data_handler.FILE_ROOMS, rooms))
+    return bill
+
+
+def _cancellable_booking(bookings, booking_id, guest_id):
+    """The booking if it can be cancelled (by this guest, when guest_id is given)."""
+    booking = _find(bookings, 'booking_id', booking_id, "Booking ID not found.")
+    if guest_id is not None and booking['guest_id'] != guest_id:
+        raise NotFound("Booking ID not found.")
+    # Only reservations that have not arrived yet can be cancelled
+    if booking['status'] != 'Confirmed':
+        raise InvalidState(f"Cannot cancel this booking. Current status is '{booking['status']}'.")
+    return booking
+
+
+def booking_for_cancel(booking_id, guest_id=None):
+    """Returns the reservation to cancel, e.g. to show it before confirming."""
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    return _cancellable_booking(bookings, booking_id, guest_id)
+
+
+def cancel_booking(booking_id, guest_id=None, today=None):
+    """
+    Cancels a Confirmed reservation and frees its room. With guest_id only
+    that guest's own bookings can be cancelled.
+    """
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    booking = _cancellable_booking(bookings, booking_id, guest_id)
+
+    booking['status'] = 'Cancelled'
+    booking['total_price'] = "0.00"
+    # The cleaning status stays, the guest never entered the room.
+    # A reservation for a later date never held the room, so it stays as it is.
+    room = data_handler.find_record_by_id(rooms, 'room_id', booking['room_id'])
+    starts_later = isinstance(booking['check_in'], date) and booking['check_in'] > _today(today)
+    if room and room['status'] == 'Reserved' and not starts_later:
+        room['status'] = 'Available'
+    _save((data_handler.FILE_BOOKINGS, bookings), (data_handler.FILE_ROOMS, rooms))
+    return booking
+
+
+def guest_history(guest_id):
+    """Returns every booking of a guest, archived ones first."""
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    # Older stays come from the archive, current ones from the guest index
+    history = list(data_handler.iter_archive(
+        data_handler.FILE_BOOKINGS, predicate=lambda b: b['guest_id'] == guest_id))
+    history += bookings.lookup('by_guest', guest_id)
+    return history
+
+
+# --- PAYMENTS ---
+def record_payment(booking_id, amount, method, today=None):
+    """Records a payment for a booking (archived ones too) and returns it."""
+    get_booking(booking_id, include_archive=True)
+    if not data_handler.is_valid_price(amount):
+        raise InvalidInput("Invalid amount entered.")
+    if method not in PAYMENT_METHODS:
+        raise InvalidInput("Payment method must be 'Cash' or 'Card'.")
+
+    payments = data_handler.read_data(data_handler.FILE_PAYMENTS)
+    payment = data_handler.Payment.from_mapping({
+        'payment_id': data_handler.next_id(data_handler.FILE_PAYMENTS),
+        'booking_id': booking_id,
+        'amount': float(amount),
+        'date': _today(today),
+        'method': method,
+    })
+    payments.append(payment)
+    _save((data_handler.FILE_PAYMENTS, payments))
+    return payment
+
+
+# --- REPORTS ---
+def income_report(start, end):
+    """
+    Returns the payments between two dates (inclusive) and their total, e.g.
+    {'payments': [...], 'total': 1250.0}
+    """
+    # Only the month files of the period are read
+    payments = list(data_handler.iter_data(
+        data_handler.FILE_PAYMENTS, columns=["date", "booking_id", "amount"], period=(start, end)))
+    return {'payments': payments, 'total': sum((float(p["amount"]) for p in payments), 0.0)}
+
+
+def outstanding_report():
+    """
+    Returns the bookings without a payment (cancelled and pending ones are
+    excluded, archived ones included) and the amount owed, e.g.
+    {'bookings': [...], 'total': 800.0}
+    """
+    payments = data_handler.iter_data(data_handler.FILE_PAYMENTS, columns=["booking_id"])
+    paid_booking_ids = {p["booking_id"] for p in payments}
+
+    bookings = data_handler.iter_data(
+        data_handler.FILE_BOOKINGS,
+        predicate=lambda b: b.get("status") not in ("Cancelled", "Pending"),
+        include_archive=True,
+    )
+    unpaid = [b for b in bookings if b["booking_id"] not in paid_booking_ids]
+    return {'bookings': unpaid, 'total': sum(float(b.get("total_price", 0)) for b in unpaid)}
+
+
+def monthly_summary(month):
+    """
+    Returns the payments of a month ('YYYY-MM') with totals per method, e.g.
+    {'payments': [...], 'count': 3, 'total': 900.0, 'by_method': {'Cash': 500.0, 'Card': 400.0}}
+    """
+    # Reads a single row to tell an empty system from a quiet month
+    if next(data_handler.iter_data(data_handler.FILE_PAYMENTS), None) is None:
+        raise NotFound("No payment records found in system.")
+
+    payments = list(data_handler.iter_data(
+        data_handler.FILE_PAYMENTS, period=data_handler.month_period(month)))
+    by_method = {}
+    for p in payments:
+        method = p.get('method', 'Unknown')
+        by_method[method] = by_method.get(method, 0.0) + float(p['amount'])
+    return {
+        'payments': payments,
+        'count': len(payments),
+        'total': sum(by_method.values()),
+        'by_method': by_method,
+    }
+
+
+def system_summary():
+    """Returns room, booking and income totals of the whole hotel."""
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    occupied = rooms.lookup_count('by_status', 'Occupied')
+
+    # Count bookings (archived ones too) without loading the whole history
+    bookings = data_handler.iter_data(data_handler.FILE_BOOKINGS, columns=['booking_id'], include_archive=True)
+    total_income = 0
+    try:
+        payments = data_handler.iter_data(data_handler.FILE_PAYMENTS, columns=['amount'])
+        total_income = sum(float(p.get('amount', 0)) for p in payments)
+    except (ValueError, TypeError):
+        pass
+
+    return {
+        'total_rooms': len(rooms),
+        'occupied': occupied,
+        'ready': ready_counts(),
+        'total_bookings': sum(1 for _ in bookings),
+        'total_income': total_income,
+    }
+
+
+def daily_report(today=None):
+    """Returns the check-ins, payments and booking counts of a day."""
+    today = _today(today)
+    # Bookings made today and status counts come straight from the indexes
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    # Payments made today (only this month's payments are read)
+    payments = list(data_handler.iter_data(data_handler.FILE_PAYMENTS, period=(today, today)))
+    return {
+        'date': today,
+        'check_ins': bookings.lookup('by_check_in', today),
+        'payments': payments,
+        'revenue': sum(float(p.get('amount', 0)) for p in payments
+                       if data_handler.is_valid_price(p.get('amount', 0))),
+        'active': bookings.lookup_count('by_status', 'Checked-in'),
+        'pending': bookings.lookup_count('by_status', 'Confirmed'),
+    }
+
+
+def occupancy_forecast(start=None, days=14, today=None):
+    """
+    Returns the booked and free rooms of each type for every night of a
+    window, e.g. occupancy_forecast("2026-03-01", 7) -> {'dates': [...],
+    'rooms': {'Double': 4, ...}, 'booked': {'Double': [2, 3, ...]},
+    'free': {'Double': [2, 1, ...]}, 'fill_rate': 62.5}.
+    Rooms in Maintenance are left out of the rooms that can be sold.
+    """
+    start = _today(today) if start is None else _as_date(start, "start")
+    days = _as_number(days, "Days", largest=366)
+    if days == 0:
+        raise InvalidInput("Days must be a number from 1 to 366.")
+    if start < data_handler.NIGHTS_EPOCH:
+        raise InvalidInput(f"The forecast cannot start before {data_handler.NIGHTS_EPOCH}.")
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+
+    # Each room's nights are one bitmap in the bookings' "stays_by_room"
+    # index; cutting out the window gives one bit string per room, and a
+    # column of those strings is one night.
+    window = data_handler.night_bits(start, start + timedelta(days=days))
+    offset = (start - data_handler.NIGHTS_EPOCH).days
+    forecast = {'start': start, 'days': days,
+                'dates': [start + timedelta(days=n) for n in range(days)],
+                'rooms': {}, 'booked': {}, 'free': {}}
+    sold = 0
+    for room_type in ROOM_TYPES:
+        in_service = [r for r in rooms.lookup('by_type', room_type) if r['status'] != 'Maintenance']
+        masks = [(bookings.nights('stays_by_room', r['room_id']) & window) >> offset for r in in_service]
+        # The bit strings put the last night first
+        nights = [format(mask, f"0{days}b")[::-1] for mask in masks]
+        booked = [column.count('1') for column in zip(*nights)] if nights else [0] * days
+        forecast['rooms'][room_type] = len(in_service)
+        forecast['booked'][room_type] = booked
+        forecast['free'][room_type] = [len(in_service) - n for n in booked]
+        sold += sum(bin(mask).count('1') for mask in masks)
+
+    room_nights = sum(forecast['rooms'].values()) * days
+    forecast['fill_rate'] = (sold / room_nights * 100) if room_nights else 0.0
+    return forecast
+
+
+def monthly_report(today=None):
+    """Returns the bookings, revenue and occupancy of today's month so far."""
+    today = _today(today)
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    month = today.strftime("%Y-%m")
+
+    # Stream only the bookings and payments of the month
+    this_month = data_handler.month_period(month)
+    bookings = list(data_handler.iter_data(data_handler.FILE_BOOKINGS, period=this_month,
+                                           include_archive=True))
+    payments = list(data_handler.iter_data(data_handler.FILE_PAYMENTS, period=this_month))
+
+    revenue = 0
+    try:
+        revenue = sum(float(p.get('amount', 0)) for p in payments)
+    except (ValueError, TypeError):
+        pass
+
+    checked_out = [b for b in bookings if b.get('status') == 'Checked-out']
+    total_rooms = len(rooms) if len(rooms) > 0 else 1
+    days_in_month = today.day
+    return {
+        'month': month,
+        'bookings': bookings,
+        'payments': payments,
+        'revenue': revenue,
+        'completed': len(checked_out),
+        'active': len([b for b in bookings if b.get('status') == 'Checked-in']),
+        'pending': len([b for b in bookings if b.get('status') == 'Confirmed']),
+        'total_rooms': total_rooms,
+        'avg_occupancy': (len(checked_out) / total_rooms / days_in_month) * 100,
+    }
@@ -0,0 +1,86 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+# ------------------------------
+# Every test works on its own copy of the project (modules + data folder),
+# because the table paths are fixed next to data_handler.py. The code under
+# test runs in a separate Python process, so two processes are two terminals
+# with their own caches, versions and locks.
+# ------------------------------
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runtime files of a running system, never copied into a test project
+RUNTIME_FILES = ("*.log", "*.tmp", "*.db", "*.lock", "*.new", "*.intent", "*.snap", "archive", "__pycache__")
+
+
+class ProjectTestCase(unittest.TestCase):
+    """A test case with a fresh copy of the project in self.project."""
+
+    storage = "text"
+
+    def setUp(self):
+        self.project = tempfile.mkdtemp(prefix="stayhub-test-")
+        self.addCleanup(shutil.rmtree, self.project, ignore_errors=True)
+        for name in os.listdir(PROJECT_DIR):
+            if name.endswith(".py"):
+                shutil.copy(os.path.join(PROJECT_DIR, name), self.project)
+        shutil.copytree(os.path.join(PROJECT_DIR, "data"), os.path.join(self.project, "data"),
+                        ignore=shutil.ignore_patterns(*RUNTIME_FILES))
+        if self.storage == "sqlite":
+            self.run_code("import data_tools, sys; sys.argv = ['data_tools.py', 'sqlite-migrate']; data_tools.main()")
+
+    def _command(self, code):
+        return [sys.executable, "-c", textwrap.dedent(code)]
+
+    def _env(self):
+        return dict(os.environ, STAYHUB_STORAGE=self.storage, PYTHONDONTWRITEBYTECODE="1")
+
+    def run_code(self, code, check=True):
+        """
+        Runs code in the test project and returns what it printed. Fails on
+        an exception unless check is False (e.g. code that crashes on purpose).
+        """
+        result = subprocess.run(self._command(code), cwd=self.project, env=self._env(),
+                                capture_output=True, text=True, timeout=120)
+        if check and result.returncode != 0:
+            self.fail(f"The test code failed:\n{result.stdout}\n{result.stderr}")
+        return result.stdout
+
+    def start_code(self, code):
+        """
+        Starts code in the test project without waiting for it. The code can
+        pause with input() until continue_code is called, e.g. to let another
+        terminal save in between.
+        """
+        process = subprocess.Popen(self._command(code), cwd=self.project, env=self._env(),
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, text=True)
+        self.addCleanup(process.kill)
+        return process
+
+    def wait_for(self, process, marker):
+        """Reads the output of a started process up to the line marker (e.g. 'ready')."""
+        lines = []
+        for line in process.stdout:
+            if line.strip() == marker:
+                return lines
+            lines.append(line)
+        self.fail(f"The test code stopped before '{marker}':\n{''.join(lines)}{process.stderr.read()}")
+
+    def continue_code(self, process):
+        """Lets a paused process go on and returns the rest of its output."""
+        output, errors = process.communicate("\n", timeout=120)
+        if process.returncode != 0:
+            self.fail(f"The test code failed:\n{output}\n{errors}")
+        return output
+
+    def read_file(self, *parts):
+        """Returns the text of a file of the test project, e.g. read_file('data', 'rooms.txt')."""
+        with open(os.path.join(self.project, *parts)) as file:
+            return file.read()
@@ -0,0 +1,168 @@
+import json
+import random
+import sys
+import unittest
+from datetime import date, timedelta
+
+from support import PROJECT_DIR, ProjectTestCase
+
+sys.path.insert(0, PROJECT_DIR)
+import data_handler
+
+
+def new_bookings():
+    """An empty bookings Table with the real indexes."""
+    return data_handler._new_table(data_handler.FILE_BOOKINGS, [])
+
+
+def booking(booking_id, room_id, check_in, nights, status="Confirmed"):
+    return data_handler.Booking.from_mapping({
+        "booking_id": booking_id, "guest_name": "John Doe", "guest_id": "G1", "room_id": room_id,
+        "check_in": check_in, "check_out": check_in + timedelta(days=nights), "nights": nights,
+        "status": status, "total_price": 100 * nights,
+    })
+
+
+class IntervalIndexTest(unittest.TestCase):
+    """The per-room stays index finds every stay that overlaps a period."""
+
+    def overlapping(self, bookings, room_id, start, end):
+        return sorted(b["booking_id"] for b in bookings.overlapping("stays_by_room", room_id, start, end))
+
+    def test_finds_the_stays_of_a_period(self):
+        bookings = new_bookings()
+        bookings.extend([booking("B1", "R1", date(2027, 3, 1), 3),
+                         booking("B2", "R1", date(2027, 3, 4), 2),
+                         booking("B3", "R2", date(2027, 3, 2), 5)])
+        self.assertEqual(self.overlapping(bookings, "R1", date(2027, 3, 3), date(2027, 3, 5)), ["B1", "B2"])
+        # Check-out day is free again
+        self.assertEqual(self.overlapping(bookings, "R1", date(2027, 3, 6), date(2027, 3, 8)), [])
+
+    def test_follows_status_and_date_changes(self):
+        bookings = new_bookings()
+        bookings.append(booking("B1", "R1", date(2027, 3, 1), 3))
+        bookings.get_by_key("B1")["status"] = "Cancelled"
+        self.assertEqual(self.overlapping(bookings, "R1", date(2027, 3, 1), date(2027, 3, 2)), [])
+
+        bookings.get_by_key("B1")["status"] = "Confirmed"
+        bookings.get_by_key("B1")["check_out"] = date(2027, 3, 10)
+        self.assertEqual(self.overlapping(bookings, "R1", date(2027, 3, 8), date(2027, 3, 9)), ["B1"])
+
+    def test_finds_stays_that_overlap_each_other(self):
+        # e.g. double bookings imported from an old system
+        bookings = new_bookings()
+        bookings.extend([booking("B1", "R9", date(2027, 3, 1), 20),
+                         booking("B2", "R9", date(2027, 3, 5), 1)])
+        self.assertEqual(self.overlapping(bookings, "R9", date(2027, 3, 10), date(2027, 3, 11)), ["B1"])
+
+    def test_matches_a_full_scan(self):
+        rng = random.Random(7)
+        bookings = new_bookings()
+        start = date(2027, 1, 1)
+        for number in range(300):
+            bookings.append(booking(f"B{number}", rng.choice(("R1", "R2")),
+                                    start + timedelta(days=rng.randint(0, 60)), rng.randint(0, 10)))
+            changed = rng.choice(bookings)
+            if rng.random() < 0.3:
+                changed["status"] = rng.choice(("Confirmed", "Cancelled", "Checked-in"))
+            elif rng.random() < 0.2:
+                changed["check_out"] = changed["check_in"] + timedelta(days=rng.randint(0, 15))
+            elif rng.random() < 0.1:
+                bookings.remove(changed)
+
+            room_id = rng.choice(("R1", "R2"))
+            first = start + timedelta(days=rng.randint(-5, 70))
+            last = first + timedelta(days=rng.randint(1, 8))
+            expected = sorted(b["booking_id"] for b in bookings
+                              if b["room_id"] == room_id and b["status"] in ("Confirmed", "Active", "Checked-in")
+                              and b["check_in"] < last and b["check_out"] > first)
+            self.assertEqual(self.overlapping(bookings, room_id, first, last), expected)
+
+
+# A terminal that books a Double for a future stay in memory, waits, then writes it
+BOOK_LATER = """
+    import json, data_handler, services
+    data_handler.set_write_behind(True)
+    booking = services.book_room("G1", "Double", 2, check_in="{check_in}")
+    print(json.dumps(booking["room_id"]))
+    print("ready", flush=True)
+    input()
+    print(data_handler.set_write_behind(False))
+"""
+
+
+class AdvanceBookingTest(ProjectTestCase):
+    """Future bookings from two terminals never give one room the same night twice."""
+
+    def book_together(self, first_check_in, second_check_in):
+        """Books in two terminals, then saves them one after the other; returns their rooms and results."""
+        first = self.start_code(BOOK_LATER.format(check_in=first_check_in))
+        second = self.start_code(BOOK_LATER.format(check_in=second_check_in))
+        rooms = [json.loads(self.wait_for(process, "ready")[-1]) for process in (first, second)]
+        saved = [self.continue_code(process).splitlines()[-1] for process in (first, second)]
+        return rooms, saved
+
+    def test_the_same_nights_cannot_be_booked_twice(self):
+        rooms, saved = self.book_together("2027-05-01", "2027-05-02")
+        self.assertEqual(rooms[0], rooms[1])
+        self.assertEqual(saved, ["True", "False"])
+
+    def test_back_to_back_stays_are_merged(self):
+        rooms, saved = self.book_together("2027-05-01", "2027-05-03")
+        self.assertEqual(rooms[0], rooms[1])
+        self.assertEqual(saved, ["True", "True"])
+        output = self.run_code("""
+            import data_handler
+            for b in data_handler.read_data(data_handler.FILE_BOOKINGS):
+                if str(b["check_in"]).startswith("2027-05"):
+                    print(b["room_id"], b["check_in"])
+        """)
+        self.assertEqual(len(output.splitlines()), 2)
+
+    def test_a_booked_room_is_not_offered_for_those_nights(self):
+        output = self.run_code("""
+            import services
+            booked = services.book_room("G1", "Double", 3, check_in="2027-05-01")["room_id"]
+            offered = services.find_free_room("Double", "2027-05-02", 1)["room_id"]
+            after = services.find_free_room("Double", "2027-05-04", 1)["room_id"]
+            print(offered != booked, after == booked)
+        """)
+        self.assertEqual(output.splitlines()[-1], "True True")
+
+
+class OverdueGuestTest(ProjectTestCase):
+    """A guest still checked in after their check-out date keeps the room."""
+
+    def test_room_of_an_overdue_guest_is_not_offered(self):
+        # B7 in R1 should have left on 2026-01-13 but is still Checked-in
+        output = self.run_code("""
+            from datetime import date, timedelta
+            import services
+            rooms = services.free_rooms("Single", "2026-10-20", "2026-10-22", today=date(2026, 10, 18))
+            print(sorted(r["room_id"] for r in rooms))
+        """)
+        self.assertNotIn("'R1'", output.splitlines()[-1])
+
+    def test_check_in_refuses_a_room_still_in_use(self):
+        output = self.run_code("""
+            from datetime import date
+            import data_handler, services
+            bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+            bookings.append({"booking_id": "B900", "guest_name": "John Doe", "guest_id": "G1", "room_id": "R1",
+                             "check_in": "2026-10-18", "check_out": "2026-10-20", "nights": "2",
+                             "status": "Confirmed", "total_price": "200.00"})
+            data_handler.save_data(data_handler.FILE_BOOKINGS, bookings)
+            try:
+                services.check_in("B900", today=date(2026, 10, 18))
+            except services.InvalidState as e:
+                print(e)
+        """)
+        self.assertEqual(output.splitlines()[-1], "Room R1 is still occupied by booking B7.")
+
+
+class SqliteAdvanceBookingTest(AdvanceBookingTest):
+    storage = "sqlite"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import sys
+import unittest
+from datetime import date, timedelta
+
+from support import PROJECT_DIR, ProjectTestCase
+
+sys.path.insert(0, PROJECT_DIR)
+import data_handler
+from test_availability import booking, new_bookings
+
+
+class NightBitsTest(unittest.TestCase):
+    """Each room's night bitmap follows its stays as they change."""
+
+    def test_bit_per_night(self):
+        epoch = data_handler.NIGHTS_EPOCH
+        self.assertEqual(data_handler.night_bits(epoch + timedelta(days=2), epoch + timedelta(days=4)), 0b1100)
+        self.assertEqual(data_handler.night_bits(epoch, epoch), 0)
+        # Nights before the epoch have no bits
+        self.assertEqual(data_handler.night_bits(epoch - timedelta(days=3), epoch + timedelta(days=1)), 0b1)
+
+    def test_bitmap_follows_the_stays(self):
+        bookings = new_bookings()
+        first = booking("B1", "R1", date(2027, 3, 1), 3)
+        second = booking("B2", "R1", date(2027, 3, 2), 4)
+        bookings.extend([first, second])
+        self.assertEqual(bookings.nights("stays_by_room", "R1"),
+                         data_handler.night_bits(date(2027, 3, 1), date(2027, 3, 6)))
+
+        # Nights shared with a remaining stay stay taken
+        second["status"] = "Cancelled"
+        self.assertEqual(bookings.nights("stays_by_room", "R1"),
+                         data_handler.night_bits(date(2027, 3, 1), date(2027, 3, 4)))
+        bookings.remove(first)
+        self.assertEqual(bookings.nights("stays_by_room", "R1"), 0)
+
+
+class ForecastTest(ProjectTestCase):
+    """The forecast counts booked and free rooms of each type per night."""
+
+    def test_counts_booked_rooms_per_night(self):
+        output = self.run_code("""
+            import json, services
+            services.book_room("G1", "Double", 2, check_in="2027-05-01")
+            services.book_room("G2", "Double", 1, check_in="2027-05-02")
+            forecast = services.occupancy_forecast("2027-05-01", 3)
+            print(json.dumps([forecast["rooms"]["Double"], forecast["booked"]["Double"], forecast["free"]["Double"]]))
+        """)
+        rooms, booked, free = json.loads(output.splitlines()[-1])
+        self.assertEqual(booked, [1, 2, 0])
+        self.assertEqual(free, [rooms - 1, rooms - 2, rooms])
+
+    def test_days_must_be_in_range(self):
+        output = self.run_code("""
+            import services
+            for days in (0, 367, "x"):
+                try:
+                    services.occupancy_forecast("2027-05-01", days)
+                except services.InvalidInput as e:
+                    print(e)
+        """)
+        self.assertEqual(len(output.splitlines()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import time
+import unittest
+
+from support import ProjectTestCase
+
+# A terminal that reads the rooms, waits, then changes one room's price
+CHANGE_PRICE_LATER = """
+    import data_handler
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    print("ready", flush=True)
+    input()
+    rooms.get_by_key("{room_id}")["price"] = "{price}"
+    print(data_handler.save_data(data_handler.FILE_ROOMS, rooms))
+"""
+
+CHANGE_PRICE_NOW = """
+    import data_handler
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    rooms.get_by_key("{room_id}")["price"] = "{price}"
+    print(data_handler.save_data(data_handler.FILE_ROOMS, rooms))
+"""
+
+READ_PRICES = """
+    import json, data_handler
+    print(json.dumps({r["room_id"]: r["price"] for r in data_handler.read_data(data_handler.FILE_ROOMS)}))
+"""
+
+
+class CompareAndSwapTest(ProjectTestCase):
+    """Saves from two terminals are merged, or refused when they change the same row."""
+
+    def prices(self):
+        return json.loads(self.run_code(READ_PRICES).splitlines()[-1])
+
+    def test_changes_to_different_rows_are_merged(self):
+        first = self.start_code(CHANGE_PRICE_LATER.format(room_id="R3", price="160"))
+        self.wait_for(first, "ready")
+        second = self.run_code(CHANGE_PRICE_NOW.format(room_id="R4", price="310"))
+        self.assertEqual(second.splitlines()[-1], "True")
+
+        self.assertEqual(self.continue_code(first).splitlines()[-1], "True")
+        prices = self.prices()
+        self.assertEqual((prices["R3"], prices["R4"]), (160.0, 310.0))
+
+    def test_change_to_the_same_row_is_refused(self):
+        first = self.start_code(CHANGE_PRICE_LATER.format(room_id="R3", price="160"))
+        self.wait_for(first, "ready")
+        self.run_code(CHANGE_PRICE_NOW.format(room_id="R3", price="170"))
+
+        output = self.continue_code(first)
+        self.assertIn("was changed by another user", output)
+        self.assertEqual(output.splitlines()[-1], "False")
+        self.assertEqual(self.prices()["R3"], 170.0)
+
+
+class LockStatsTest(ProjectTestCase):
+    """Server stats count the locks taken and the ones another terminal held."""
+
+    def test_waiting_for_another_terminal_is_counted(self):
+        holder = self.start_code("""
+            import data_handler
+            with data_handler._file_lock(data_handler.FILE_ROOMS):
+                print("ready", flush=True)
+                input()
+        """)
+        self.wait_for(holder, "ready")
+        saver = self.start_code("""
+            import json, data_handler, server
+            rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+            print("saving", flush=True)
+            data_handler.save_data(data_handler.FILE_ROOMS, rooms)
+            print(json.dumps(server.server_stats()["locks"]["rooms.txt"]))
+        """)
+        self.wait_for(saver, "saving")
+        time.sleep(0.3)
+        self.continue_code(holder)
+
+        stats = json.loads(self.continue_code(saver).splitlines()[-1])
+        self.assertEqual((stats["acquired"], stats["contended"]), (1, 1))
+        self.assertGreater(stats["wait_max"], 0.2)
+        self.assertEqual(stats["wait_total"], stats["wait_max"])
+
+
+class JournalCompareAndSwapTest(CompareAndSwapTest):
+    storage = "journal"
+
+
+class SqliteCompareAndSwapTest(CompareAndSwapTest):
+    storage = "sqlite"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import json
+import unittest
+
+from support import ProjectTestCase
+
+# Books a group and prints the result (or the refusal) as JSON
+BOOK_GROUP = """
+    import json, data_handler, services
+    before = len(data_handler.read_data(data_handler.FILE_BOOKINGS))
+    try:
+        group = services.book_group("G1", {counts!r}, 2, check_in="2027-06-01")
+        result = {{"rooms": group["rooms"], "total": group["total"],
+                   "types": [data_handler.read_data(data_handler.FILE_ROOMS).get_by_key(r)["type"] for r in group["rooms"]],
+                   "guests": sorted({{b["guest_id"] for b in group["bookings"]}}),
+                   "prices": sum(b["total_price"] for b in group["bookings"])}}
+    except services.ServiceError as e:
+        result = {{"error": type(e).__name__}}
+    data_handler.clear_cache()
+    result["added"] = len(data_handler.read_data(data_handler.FILE_BOOKINGS)) - before
+    print(json.dumps(result))
+"""
+
+
+class GroupBookingTest(ProjectTestCase):
+    """A group gets every room it asks for, or none of them."""
+
+    def book(self, counts):
+        return json.loads(self.run_code(BOOK_GROUP.format(counts=counts)).splitlines()[-1])
+
+    def test_books_every_room_of_the_group(self):
+        result = self.book({"Double": 2, "single": 1})
+        self.assertEqual(result["added"], 3)
+        self.assertEqual(len(set(result["rooms"])), 3)
+        self.assertEqual(sorted(result["types"]), ["Double", "Double", "Single"])
+        self.assertEqual(result["guests"], ["G1"])
+        self.assertEqual(result["total"], result["prices"])
+
+    def test_second_group_gets_other_rooms(self):
+        first = self.book({"Double": 2})
+        second = self.book({"Double": 2})
+        self.assertFalse(set(first["rooms"]) & set(second["rooms"]))
+
+    def test_nothing_is_booked_when_a_type_runs_out(self):
+        result = self.book({"Double": 1, "Deluxe": 50})
+        self.assertEqual(result, {"error": "InvalidInput", "added": 0})
+        result = self.book({"Double": 1, "Deluxe": 5})
+        self.assertEqual(result, {"error": "NoRoomAvailable", "added": 0})
+
+    def test_counts_must_be_positive_numbers(self):
+        for counts in ({"Double": 0}, {"Double": "x"}, {}, ["Double"]):
+            self.assertEqual(self.book(counts), {"error": "InvalidInput", "added": 0}, counts)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import json
+import unittest
+
+from support import ProjectTestCase
+
+# Imports one room and prints its ID and the rooms sequence afterwards
+IMPORT_ROOM = """
+    import json, os, data_handler
+    {setup}
+    stamp = os.stat(data_handler.FILE_SEQUENCES).st_mtime_ns
+    rows = [{{"room_id": "{room_id}", "type": "Single", "price": "90", "status": "Available", "cleaning_status": "Clean"}}]
+    data_handler.bulk_import(data_handler.FILE_ROOMS, rows)
+    print(json.dumps([data_handler.read_data(data_handler.FILE_ROOMS)[-1]["room_id"], data_handler._read_sequences()["rooms"],
+                      os.stat(data_handler.FILE_SEQUENCES).st_mtime_ns != stamp]))
+"""
+
+
+class ImportIdTest(ProjectTestCase):
+    """Imported rows keep their IDs, and the sequence only moves when it has to."""
+
+    def import_room(self, room_id, setup=""):
+        return json.loads(self.run_code(IMPORT_ROOM.format(room_id=room_id, setup=setup)).splitlines()[-1])
+
+    def test_rows_without_an_id_get_one_from_the_sequence(self):
+        self.assertEqual(self.import_room(""), ["R12", 13, True])
+
+    def test_sequence_moves_past_a_higher_imported_id(self):
+        self.assertEqual(self.import_room("R500"), ["R500", 501, True])
+
+    def test_sequence_is_left_alone_below_it(self):
+        setup = 'data_handler.reserve_ids(data_handler.FILE_ROOMS, 10)'
+        self.assertEqual(self.import_room("R15", setup), ["R15", 22, False])
+
+    def test_reserved_ids_never_repeat_an_imported_one(self):
+        output = self.run_code("""
+            import data_handler
+            data_handler.set_write_behind(True)
+            first = data_handler.next_id(data_handler.FILE_ROOMS)
+            rows = [{"room_id": "R14", "type": "Single", "price": "90", "status": "Available", "cleaning_status": "Clean"}]
+            data_handler.bulk_import(data_handler.FILE_ROOMS, rows)
+            print(first, data_handler.next_id(data_handler.FILE_ROOMS))
+        """)
+        self.assertEqual(output.splitlines()[-1], "R12 R15")
+
+
+if __name__ == "__main__":
+    unittest.main()
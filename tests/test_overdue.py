@@ -0,0 +1,57 @@
+import json
+import unittest
+
+from support import ProjectTestCase
+
+# The overdue report on a given day as JSON: [[booking, days, fee], ...] and the total
+OVERDUE_REPORT = """
+    import json
+    from datetime import date
+    import services
+    {setup}
+    report = services.overdue_report(today=date({day}))
+    print(json.dumps([[[s["booking"]["booking_id"], s["overdue_days"], s["late_fee"]] for s in report["stays"]],
+                      report["total"]]))
+"""
+
+
+class OverdueReportTest(ProjectTestCase):
+    """In-house stays past their check-out date are listed with their late fees."""
+
+    def report(self, day, setup=""):
+        return json.loads(self.run_code(OVERDUE_REPORT.format(day=day, setup=setup)).splitlines()[-1])
+
+    def test_lists_overdue_stays_longest_first(self):
+        # B4 (R2, 100 a night) should have left on 2025-12-30, B7 (R1, 100) on 2026-01-13
+        stays, total = self.report("2026, 1, 14")
+        self.assertEqual(stays, [["B4", 15, 1500.0], ["B7", 1, 100.0]])
+        self.assertEqual(total, 1600.0)
+
+    def test_stays_that_are_not_overdue_are_left_out(self):
+        # B7 leaves today, so it is not overdue yet; a walk-in today leaves later
+        setup = 'services.walk_in("G1", "Single", 2, today=date(2026, 1, 13))'
+        stays, total = self.report("2026, 1, 13", setup)
+        self.assertEqual(stays, [["B4", 14, 1400.0]])
+        self.assertEqual(total, 1400.0)
+
+    def test_checked_out_stays_are_left_out(self):
+        setup = 'services.check_out("R2", today=date(2026, 1, 14))'
+        stays, total = self.report("2026, 1, 14", setup)
+        self.assertEqual(stays, [["B7", 1, 100.0]])
+        self.assertEqual(total, 100.0)
+
+    def test_fee_matches_the_check_out_bill(self):
+        output = self.run_code("""
+            import json
+            from datetime import date
+            import services
+            stay = services.overdue_report(today=date(2026, 1, 20))["stays"][0]
+            bill = services.check_out_bill(stay["booking"]["room_id"], today=date(2026, 1, 20))
+            print(json.dumps([stay["late_fee"], bill["late_fee"]]))
+        """)
+        report_fee, bill_fee = json.loads(output.splitlines()[-1])
+        self.assertEqual(report_fee, bill_fee)
+
+
+if __name__ == "__main__":
+    unittest.main()
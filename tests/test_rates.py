@@ -0,0 +1,116 @@
+import json
+import unittest
+
+from support import ProjectTestCase
+
+# Prices many stays with quote_stays and night by night from rates.txt
+# (the last matching rate line wins, base price otherwise), as JSON pairs
+COMPARE_WITH_NIGHTLY_PRICES = """
+    import json
+    from datetime import date, timedelta
+    import data_handler, services
+
+    def nightly_price(room_type, base_price, check_in, nights):
+        total = 0.0
+        for n in range(nights):
+            night = check_in + timedelta(days=n)
+            price = base_price
+            for r in data_handler.read_data(data_handler.FILE_RATES):
+                days = r["days"].split()
+                if (r["room_type"] == room_type and r["start"] <= night < r["end"]
+                        and ("All" in days or services.WEEKDAYS[night.weekday()] in days)):
+                    price = r["price"]
+            total += price
+        return total
+
+    pairs = []
+    for room_type, base_price in {cases!r}:
+        stays = [(date(2026, 12, 1) + timedelta(days=d), n) for d in range(0, 150, 3) for n in (0, 1, 2, 5, 9)]
+        quoted = services.quote_stays(room_type, [(str(c), n) for c, n in stays])
+        pairs += [[q, nightly_price(room_type, base_price, c, n)] for q, (c, n) in zip(quoted, stays)]
+    print(json.dumps(pairs))
+"""
+
+
+class RateCalendarTest(ProjectTestCase):
+    """Stay prices follow the rate calendar night by night."""
+
+    def last_json(self, output):
+        return json.loads(output.splitlines()[-1])
+
+    def test_quotes_match_night_by_night_prices(self):
+        # The cheapest room of each type is the base price
+        pairs = self.last_json(self.run_code(COMPARE_WITH_NIGHTLY_PRICES.format(
+            cases=[("Single", 100.0), ("Double", 150.0), ("Deluxe", 300.0)])))
+        for quoted, expected in pairs:
+            self.assertAlmostEqual(quoted, expected, places=2)
+
+    def test_stay_across_the_start_of_a_rate(self):
+        # Two nights at the Double base price, then two holiday nights
+        prices = self.last_json(self.run_code("""
+            import json, services
+            print(json.dumps(services.quote_stays("Double", [("2026-12-18", 4), ("2026-12-20", 1)])))
+        """))
+        self.assertEqual(prices, [2 * 150.0 + 2 * 220.0, 220.0])
+
+    def test_new_rate_lines_are_used_at_once(self):
+        prices = self.last_json(self.run_code("""
+            import json, data_handler, services
+            before = services.quote_stays("Single", [("2027-02-01", 2)])
+            rates = data_handler.read_data(data_handler.FILE_RATES)
+            rates.append({"rate_id": "RT9", "room_type": "Single", "start": "2027-02-01",
+                          "end": "2027-02-02", "days": "All", "price": "90.00"})
+            data_handler.save_data(data_handler.FILE_RATES, rates)
+            print(json.dumps(before + services.quote_stays("Single", [("2027-02-01", 2)])))
+        """))
+        self.assertEqual(prices, [200.0, 190.0])
+
+    def test_bad_stays_are_refused(self):
+        output = self.run_code("""
+            import services
+            for stays in ([("2027-02-01", "x")], [("2027-02-30", 1)], [("2027-02-01",)], [("2027-02-01", 400)]):
+                try:
+                    services.quote_stays("Single", stays)
+                except services.InvalidInput as e:
+                    print(e)
+        """)
+        self.assertEqual(len(output.splitlines()), 4)
+
+
+class QuotedBookingTest(ProjectTestCase):
+    """A guest books the room and price they were quoted."""
+
+    def test_books_the_quoted_room_at_the_quoted_price(self):
+        # R2 (100) and R10 (145.5) are both Singles; the quote picks one of them
+        output = self.run_code("""
+            import json, services
+            offer = services.quote("Single", "2027-02-01", 2)
+            booking = services.book_room("G1", "Single", 2, check_in="2027-02-01",
+                                         room_id=offer["room"]["room_id"], quoted_total=offer["total"])
+            print(json.dumps([offer["room"]["room_id"], booking["room_id"], offer["total"], booking["total_price"]]))
+        """)
+        quoted_room, booked_room, quoted_total, booked_total = json.loads(output.splitlines()[-1])
+        self.assertEqual((booked_room, booked_total), (quoted_room, quoted_total))
+
+    def test_refuses_a_taken_room_or_a_changed_price(self):
+        output = self.run_code("""
+            import services
+            offer = services.quote("Single", "2027-02-01", 2)
+            room_id = offer["room"]["room_id"]
+            for total in (offer["total"] + 10, offer["total"]):
+                try:
+                    services.book_room("G1", "Single", 2, check_in="2027-02-01", room_id=room_id, quoted_total=total)
+                    print("booked")
+                except services.ServiceError as e:
+                    print(type(e).__name__)
+            try:
+                services.book_room("G2", "Single", 2, check_in="2027-02-02", room_id=room_id)
+            except services.NoRoomAvailable as e:
+                print(type(e).__name__)
+        """)
+        results = [line for line in output.splitlines() if not line.startswith("Success:")]
+        self.assertEqual(results, ["InvalidState", "booked", "NoRoomAvailable"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import unittest
+
+from support import ProjectTestCase
+
+# A terminal that saves a new booking and its room together but dies after
+# the first file of the transaction was written
+CRASH_DURING_SAVE = """
+    import os, data_handler
+    apply_step = data_handler._apply_step
+    def apply_and_crash(step):
+        apply_step(step)
+        os._exit(1)
+    data_handler._apply_step = apply_and_crash
+
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    rooms.get_by_key("R9")["status"] = "Reserved"
+    bookings.append({"booking_id": "B900", "guest_name": "John Doe", "guest_id": "G1", "room_id": "R9",
+                     "check_in": "2026-01-20", "check_out": "2026-01-22", "nights": "2",
+                     "status": "Confirmed", "total_price": "300.00"})
+    data_handler.save_tables([(data_handler.FILE_BOOKINGS, bookings), (data_handler.FILE_ROOMS, rooms)])
+"""
+
+READ_STATE = """
+    import json, data_handler
+    rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+    bookings = data_handler.read_data(data_handler.FILE_BOOKINGS)
+    print(json.dumps({"R9": rooms.get_by_key("R9")["status"], "R10": rooms.get_by_key("R10")["price"],
+                      "B900": bookings.get_by_key("B900") is not None}))
+"""
+
+
+class RecoveryTest(ProjectTestCase):
+    """A transaction cut short by a crash is finished by the next terminal."""
+
+    def leftovers(self):
+        """Intent and staged files still in the data folder."""
+        names = []
+        for folder, _, files in os.walk(os.path.join(self.project, "data")):
+            names += [name for name in files if name.endswith((".intent", ".new"))]
+        return names
+
+    def state(self):
+        return json.loads(self.run_code(READ_STATE).splitlines()[-1])
+
+    def test_crash_leaves_an_intent_file(self):
+        self.run_code(CRASH_DURING_SAVE, check=False)
+        self.assertTrue(any(name.endswith(".intent") for name in self.leftovers()))
+
+    def test_next_read_finishes_the_transaction(self):
+        self.run_code(CRASH_DURING_SAVE, check=False)
+        self.assertEqual(self.state(), {"R9": "Reserved", "R10": 145.5, "B900": True})
+        self.assertEqual(self.leftovers(), [])
+
+    def test_next_save_finishes_it_under_the_locks(self):
+        # This terminal read the rooms before the crash and saves afterwards,
+        # so only save_tables can find the unfinished transaction
+        other = self.start_code("""
+            import data_handler
+            rooms = data_handler.read_data(data_handler.FILE_ROOMS)
+            print("ready", flush=True)
+            input()
+            rooms.get_by_key("R10")["price"] = "150"
+            print(data_handler.save_data(data_handler.FILE_ROOMS, rooms))
+        """)
+        self.wait_for(other, "ready")
+        self.run_code(CRASH_DURING_SAVE, check=False)
+        self.assertNotEqual(self.leftovers(), [])
+
+        self.assertEqual(self.continue_code(other).splitlines()[-1], "True")
+        self.assertEqual(self.leftovers(), [])
+        self.assertEqual(self.state(), {"R9": "Reserved", "R10": 150.0, "B900": True})
+
+
+class JournalRecoveryTest(RecoveryTest):
+    storage = "journal"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import unittest
+
+from support import ProjectTestCase
+
+# A server-like terminal that keeps its room change in memory, waits, and
+# then writes it (set_write_behind(False) flushes what is pending)
+DEFERRED_PRICE_CHANGE = """
+    import json, data_handler, services
+    data_handler.set_write_behind(True)
+    services.update_room("{room_id}", price="{price}")
+    print("ready", flush=True)
+    input()
+    flushed = data_handler.set_write_behind(False)
+    price = data_handler.read_data(data_handler.FILE_ROOMS).get_by_key("{room_id}")["price"]
+    print(json.dumps({{"flushed": flushed, "pending": data_handler.pending_writes(), "price": price}}))
+"""
+
+SAVED_PRICE_CHANGE = """
+    import services
+    services.update_room("{room_id}", price="{price}")
+"""
+
+READ_PRICES = """
+    import json, data_handler
+    print(json.dumps({r["room_id"]: r["price"] for r in data_handler.read_data(data_handler.FILE_ROOMS)}))
+"""
+
+
+class WriteBehindTest(ProjectTestCase):
+    """Tables saved in memory are written later without losing anyone's changes."""
+
+    def last_json(self, output):
+        return json.loads(output.splitlines()[-1])
+
+    def test_flush_merges_changes_to_other_rows(self):
+        server = self.start_code(DEFERRED_PRICE_CHANGE.format(room_id="R3", price="160"))
+        self.wait_for(server, "ready")
+        self.run_code(SAVED_PRICE_CHANGE.format(room_id="R4", price="310"))
+
+        result = self.last_json(self.continue_code(server))
+        self.assertEqual(result, {"flushed": True, "pending": [], "price": 160.0})
+        prices = self.last_json(self.run_code(READ_PRICES))
+        self.assertEqual((prices["R3"], prices["R4"]), (160.0, 310.0))
+
+    def test_failed_flush_keeps_the_changes_pending(self):
+        server = self.start_code(DEFERRED_PRICE_CHANGE.format(room_id="R3", price="160"))
+        self.wait_for(server, "ready")
+        self.run_code(SAVED_PRICE_CHANGE.format(room_id="R3", price="170"))
+
+        # The conflict is reported and the server's change is still in memory
+        result = self.last_json(self.continue_code(server))
+        self.assertEqual(result, {"flushed": False, "pending": ["rooms.txt"], "price": 160.0})
+        self.assertEqual(self.last_json(self.run_code(READ_PRICES))["R3"], 170.0)
+
+    def test_retried_flush_does_not_overwrite_the_other_terminal(self):
+        server = self.start_code(DEFERRED_PRICE_CHANGE.format(room_id="R3", price="160")
+                                 + "    print(data_handler.flush_writes())\n")
+        self.wait_for(server, "ready")
+        self.run_code(SAVED_PRICE_CHANGE.format(room_id="R3", price="170"))
+
+        self.assertEqual(self.continue_code(server).splitlines()[-1], "False")
+        self.assertEqual(self.last_json(self.run_code(READ_PRICES))["R3"], 170.0)
+
+    def test_new_guest_can_log_in_before_the_flush(self):
+        output = self.run_code("""
+            import data_handler, services
+            data_handler.set_write_behind(True)
+            services.register_guest("Ann Lee", "Z9988776", "0123456789", "ann@example.com", "ann", "Secret123!")
+            print(services.login("ann", "Secret123!")[0])
+            try:
+                services.register_guest("Ann Tan", "Z1122334", "0123456789", "tan@example.com", "ann", "Secret123!")
+            except services.AlreadyExists as e:
+                print(e)
+        """)
+        self.assertEqual(output.splitlines()[-2:], ["Guest", "Username already taken!"])
+
+
+class ServerRequestTest(ProjectTestCase):
+    """Bad requests get an error response and the connection stays open."""
+
+    def request(self, request, role="Receptionist", setup=""):
+        output = self.run_code(f"""
+            import json, server
+            {setup}
+            print(json.dumps(server.handle_request({{"role": {role!r}}}, {request!r})))
+        """)
+        return json.loads(output.splitlines()[-1])
+
+    def test_nights_must_be_a_number(self):
+        for nights in ("abc", "²", "-1", 9999, True):
+            response = self.request({"op": "find_free_room", "args": {"room_type": "Double", "nights": nights}})
+            self.assertEqual(response["error"], "InvalidInput", nights)
+
+    def test_today_is_set_by_the_server(self):
+        response = self.request({"op": "find_free_room", "args": {"room_type": "Double", "today": "2030-01-01"}})
+        self.assertEqual(response, {"ok": False, "error": "InvalidInput", "message": "'today' is set by the server."})
+
+    def test_unexpected_errors_are_bad_requests(self):
+        # An operation failing with something other than a ServiceError
+        setup = "server.OPERATIONS['rooms_to_clean'] = (lambda: {}['R1'], ('Manager',))"
+        response = self.request({"op": "rooms_to_clean"}, role="Manager", setup=setup)
+        self.assertEqual(response, {"ok": False, "error": "BadRequest",
+                                    "message": "Operation 'rooms_to_clean' failed: KeyError: 'R1'"})
+
+
+if __name__ == "__main__":
+    unittest.main()